@@ -0,0 +1,225 @@
+import os
+
+import pygame
+
+import atlas
+
+# Atlas holding the tiles, icons, buttons and animation frames, pre-scaled
+ATLAS_PATH = "cache/atlas/sprites.atlas"
+# Fingerprint of the atlas sources and their hash, so unchanged sources are
+# not read on every start
+STAMP_PATH = "cache/atlas/sprites.stamp"
+# Soldier animations, in the order of the soldier action numbers
+ANIMATIONS = ["Idle", "Run", "Jump", "Shoot", "Death"]
+ICONS = ["bullet", "grenade", "health_box", "ammo_box", "grenade_box"]
+BUTTONS = ["start_btn", "exit_btn", "restart_btn"]
+EXPLOSION_FRAMES = 5
+# Animation frames shared by every soldier, keyed by (char_type, animation, scale)
+animation_cache = {}
+# Explosion frames shared by every explosion, keyed by scale
+explosion_cache = {}
+# Number of images read from disk, in total and since gameplay started
+stats = {"disk_loads": 0, "gameplay_disk_loads": 0}
+in_gameplay = False
+
+
+def load_image(path):
+    """Loads an image from disk and converts it to the display format
+
+    Args:
+        path (string): image file path
+
+    Returns:
+        Surface: converted image with per pixel alpha
+    """
+    stats["disk_loads"] += 1
+    if in_gameplay:
+        stats["gameplay_disk_loads"] += 1
+    return pygame.image.load(path).convert_alpha()
+
+
+def scale_image(img, scale):
+    """Scales an image by a factor
+
+    Args:
+        img (Surface): image to scale
+        scale (float): scale factor
+
+    Returns:
+        Surface: scaled image
+    """
+    return pygame.transform.scale(
+        img, (int(img.get_width() * scale), int(img.get_height() * scale))
+    )
+
+
+def begin_gameplay():
+    """Starts counting the disk loads that happen while playing"""
+    global in_gameplay
+    in_gameplay = True
+
+
+def load_animation(char_type, animation, scale):
+    """Loads, scales and flips the frames of an animation once per process
+
+    Args:
+        char_type (string): soldier type (player or enemy)
+        animation (string): animation folder name
+        scale (float): scale for images
+
+    Returns:
+        list[tuple]: (right facing, left facing) scaled frames, shared between
+        all callers
+    """
+    key = (char_type, animation, scale)
+    frames = animation_cache.get(key)
+    if frames is None:
+        frames = []
+        folder = f"img/{char_type}/{animation}"
+        # Characters without an animation simply have no folder for it
+        if os.path.isdir(folder):
+            # Count number of files in the folder
+            num_of_frames = len(os.listdir(folder))
+            for i in range(num_of_frames):
+                img = scale_image(load_image(f"{folder}/{i}.png"), scale)
+                frames.append((img, pygame.transform.flip(img, True, False)))
+        animation_cache[key] = frames
+    return frames
+
+
+def load_explosion(scale):
+    """Loads and scales the explosion frames once per scale
+
+    Args:
+        scale (float): scale for images
+
+    Returns:
+        list[Surface]: scaled frames, shared between all explosions
+    """
+    frames = explosion_cache.get(scale)
+    if frames is None:
+        frames = []
+        for num in range(1, EXPLOSION_FRAMES + 1):
+            img = load_image(f"img/explosion/exp{num}.png")
+            frames.append(scale_image(img, scale))
+        explosion_cache[scale] = frames
+    return frames
+
+
+def atlas_sources(tile_types, soldier_types):
+    """Lists the source image of everything packed in the sprite atlas
+
+    Args:
+        tile_types (integer): number of tile images
+        soldier_types (iterable[string]): soldier types with animations
+
+    Returns:
+        dict: image path by atlas name, the path without img/ and .png
+    """
+    names = [f"tile/{x}" for x in range(tile_types)]
+    names += [f"icons/{icon}" for icon in ICONS]
+    names += BUTTONS
+    for char_type in soldier_types:
+        for animation in ANIMATIONS:
+            folder = f"img/{char_type}/{animation}"
+            if os.path.isdir(folder):
+                names += [
+                    f"{char_type}/{animation}/{i}"
+                    for i in range(len(os.listdir(folder)))
+                ]
+    names += [f"explosion/exp{num}" for num in range(1, EXPLOSION_FRAMES + 1)]
+    return {name: f"img/{name}.png" for name in names}
+
+
+def build_atlas(sources, tile_size, soldier_scales, explosion_scale):
+    """Loads and scales the source images and packs them into an atlas
+
+    Args:
+        sources (dict): image path by atlas name, see atlas_sources
+        tile_size (integer): tile width and height
+        soldier_scales (dict): animation scale by soldier type
+        explosion_scale (float): explosion scale
+
+    Returns:
+        Atlas: packed images
+    """
+    images = {}
+    for name, path in sources.items():
+        img = load_image(path)
+        kind = name.split("/")[0]
+        if kind == "tile":
+            img = pygame.transform.scale(img, (tile_size, tile_size))
+        elif kind == "explosion":
+            img = scale_image(img, explosion_scale)
+        elif kind in soldier_scales:
+            img = scale_image(img, soldier_scales[kind])
+        images[name] = img
+    return atlas.build(images)
+
+
+def load_atlas(tile_size, tile_types, soldier_scales, explosion_scale):
+    """Loads the tiles, icons, buttons and animation frames in one read
+
+    The atlas is built the first time and again whenever an image in img or
+    one of the sizes changes. The images are only read to check for changes
+    when their modification time or size changed. The animation and
+    explosion frames are put in their caches, so load_animation and
+    load_explosion read nothing.
+
+    Args:
+        tile_size (integer): tile width and height
+        tile_types (integer): number of tile images
+        soldier_scales (dict): animation scale by soldier type
+        explosion_scale (float): explosion scale
+
+    Returns:
+        Atlas: packed images, see atlas_sources for their names
+    """
+    sources = atlas_sources(tile_types, soldier_scales)
+    checksum = atlas.cached_source_hash(
+        sources, [tile_size, soldier_scales, explosion_scale], STAMP_PATH
+    )
+    sprites = atlas.load(ATLAS_PATH, checksum)
+    if sprites is None:
+        sprites = build_atlas(
+            sources, tile_size, soldier_scales, explosion_scale
+        )
+        atlas.save(sprites, ATLAS_PATH, checksum)
+    else:
+        stats["disk_loads"] += 1
+    for char_type, scale in soldier_scales.items():
+        for animation in ANIMATIONS:
+            prefix = f"{char_type}/{animation}/"
+            count = sum(name.startswith(prefix) for name in sources)
+            frames = []
+            for i in range(count):
+                img = sprites.image(f"{prefix}{i}")
+                frames.append((img, pygame.transform.flip(img, True, False)))
+            animation_cache[(char_type, animation, scale)] = frames
+    explosion_cache[explosion_scale] = [
+        sprites.image(f"explosion/exp{num}")
+        for num in range(1, EXPLOSION_FRAMES + 1)
+    ]
+    return sprites
+
+
+def main():
+    """Builds the sprite atlas ahead of the first start of the game"""
+    # The game builds the atlas as it starts, no window or audio needed
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import shooter
+
+    shooter.startup.run_until("sprites")
+    width, height = shooter.sprites.surface.get_size()
+    # This module runs as __main__, the game counted its reads in its own copy
+    reads = shooter.assets.stats["disk_loads"]
+    print(
+        f"{ATLAS_PATH}: {len(shooter.sprites.regions)} images, "
+        f"{width}x{height}, {reads} image files read"
+    )
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
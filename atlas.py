@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+import pygame
+
+# File header: magic, format version, atlas width and height, length of the
+# regions table and the hash of the sources the atlas was built from
+MAGIC = b"ESAT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHI32s")
+# Images are packed in rows no wider than this
+MAX_WIDTH = 1024
+
+
+class Atlas:
+    """Class that represents many images packed into a single surface
+
+    Every image is a subsurface of the atlas, so loading the atlas is one
+    decode however many images it holds.
+    """
+
+    def __init__(self, surface, regions):
+        """Constructor
+
+        Args:
+            surface (Surface): packed images
+            regions (dict): (x, y, width, height) of each image, by name
+        """
+        self.surface = surface
+        self.regions = regions
+        self.images = {
+            name: surface.subsurface(region)
+            for name, region in regions.items()
+        }
+
+    def image(self, name):
+        """Returns one of the packed images
+
+        Args:
+            name (string): image name
+
+        Returns:
+            Surface: subsurface of the atlas
+        """
+        return self.images[name]
+
+
+def pack(sizes):
+    """Places rectangles in rows, tallest first
+
+    Args:
+        sizes (dict): (width, height) of each rectangle, by name
+
+    Returns:
+        tuple: atlas width, atlas height and the (x, y, width, height) of
+        each rectangle by name
+    """
+    regions = {}
+    x = y = row_height = width = 0
+    for name, (w, h) in sorted(
+        sizes.items(), key=lambda item: (-item[1][1], item[0])
+    ):
+        if x + w > MAX_WIDTH and x > 0:
+            y += row_height
+            x = row_height = 0
+        regions[name] = (x, y, w, h)
+        x += w
+        width = max(width, x)
+        row_height = max(row_height, h)
+    return width, y + row_height, regions
+
+
+def build(images):
+    """Packs images into an atlas
+
+    Args:
+        images (dict): images by name
+
+    Returns:
+        Atlas: atlas holding a copy of every image
+    """
+    width, height, regions = pack(
+        {name: image.get_size() for name, image in images.items()}
+    )
+    surface = pygame.Surface((max(width, 1), max(height, 1)), pygame.SRCALPHA)
+    for name, image in images.items():
+        surface.blit(image, regions[name][:2])
+    return Atlas(surface, regions)
+
+
+def source_hash(sources, params):
+    """Hashes the source files of an atlas and how they were processed
+
+    Args:
+        sources (dict): source file path of each image, by name
+        params (object): JSON serialisable build parameters, such as sizes
+
+    Returns:
+        bytes: sha256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([VERSION, params], sort_keys=True).encode())
+    for name in sorted(sources):
+        digest.update(name.encode() + b"\0")
+        with open(sources[name], "rb") as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    return digest.digest()
+
+
+def source_stamp(sources, params):
+    """Fingerprints the source files of an atlas from their metadata only
+
+    Args:
+        sources (dict): source file path of each image, by name
+        params (object): JSON serialisable build parameters, such as sizes
+
+    Returns:
+        bytes: sha256 digest of the parameters and of the modification time
+        and size of every source
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([VERSION, params], sort_keys=True).encode())
+    for name in sorted(sources):
+        stat = os.stat(sources[name])
+        digest.update(name.encode() + b"\0")
+        digest.update(struct.pack("<qQ", stat.st_mtime_ns, stat.st_size))
+    return digest.digest()
+
+
+def cached_source_hash(sources, params, path):
+    """Hashes the source files of an atlas unless their metadata is unchanged
+
+    The hash is stored with the fingerprint of the sources it was computed
+    from, see source_stamp. Reading it back costs one stat per source instead
+    of reading every source.
+
+    Args:
+        sources (dict): source file path of each image, by name
+        params (object): JSON serialisable build parameters, such as sizes
+        path (string): file the fingerprint and the hash are kept in
+
+    Returns:
+        bytes: sha256 digest, see source_hash
+    """
+    stamp = source_stamp(sources, params)
+    if os.path.exists(path):
+        with open(path, "rb") as file:
+            data = file.read()
+        if len(data) == 64 and data[:32] == stamp:
+            return data[32:]
+    checksum = source_hash(sources, params)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(stamp + checksum)
+    os.replace(temporary, path)
+    return checksum
+
+
+def save(atlas, path, checksum):
+    """Writes an atlas to a file
+
+    Args:
+        atlas (Atlas): atlas to write
+        path (string): atlas file path
+        checksum (bytes): hash of the sources, see source_hash
+    """
+    width, height = atlas.surface.get_size()
+    regions = json.dumps(atlas.regions).encode()
+    pixels = zlib.compress(pygame.image.tobytes(atlas.surface, "RGBA"))
+    header = HEADER.pack(
+        MAGIC, VERSION, width, height, len(regions), checksum
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so a reader never sees half an atlas,
+    # one per process since several processes may build at the same time
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(header + regions + pixels)
+    os.replace(temporary, path)
+
+
+def load(path, checksum):
+    """Reads an atlas file if it was built from the current sources
+
+    Args:
+        path (string): atlas file path
+        checksum (bytes): hash of the sources, see source_hash
+
+    Returns:
+        Atlas: atlas converted to the display format, None if missing,
+        outdated or invalid
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        return None
+    magic, version, width, height, length, stored = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or stored != checksum:
+        return None
+    start = HEADER.size + length
+    try:
+        regions = json.loads(data[HEADER.size:start])
+        pixels = zlib.decompress(data[start:])
+    except (ValueError, zlib.error):
+        return None
+    if len(pixels) != width * height * 4:
+        return None
+    surface = pygame.image.frombuffer(pixels, (width, height), "RGBA")
+    regions = {name: tuple(region) for name, region in regions.items()}
+    return Atlas(surface.convert_alpha(), regions)
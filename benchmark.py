@@ -0,0 +1,272 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+import headless
+import shooter
+import assets
+import levels
+from shooter import Game, Inputs, ROWS, COLS, TILE_SIZE
+
+
+class PhaseTimer:
+    """Class that accumulates the time spent in each phase of a frame"""
+
+    def __init__(self):
+        """Constructor"""
+        self.totals = {}
+        self.worst = {}
+
+    def begin_frame(self):
+        """Marks the start of a frame, totals do not need to know"""
+
+    @contextmanager
+    def phase(self, name):
+        """Times the code run inside the context
+
+        Args:
+            name (string): phase name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.totals[name] = self.totals.get(name, 0) + elapsed
+            self.worst[name] = max(self.worst.get(name, 0), elapsed)
+
+    def report(self, frames):
+        """Summarises the phase times
+
+        Args:
+            frames (integer): number of frames timed
+
+        Returns:
+            dict: total, mean per frame and worst time of each phase in ms
+        """
+        return {
+            name: {
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / max(frames, 1), 4),
+                "max_ms": round(self.worst[name] * 1000, 4),
+            }
+            for name, total in self.totals.items()
+        }
+
+
+def stress_level(enemies):
+    """Builds a synthetic level with platforms full of enemies
+
+    Args:
+        enemies (integer): number of enemies to place
+
+    Returns:
+        Level: level tiles
+    """
+    data = [[-1] * COLS for row in range(ROWS)]
+    # Ground and three platforms, enemies stand on top of each of them
+    floors = [ROWS - 1, ROWS - 5, ROWS - 9, ROWS - 13]
+    for row in floors:
+        for col in range(COLS):
+            data[row][col] = 0
+    data[ROWS - 2][2] = 15  # Player
+    placed = 0
+    for row in floors:
+        for col in range(6, COLS - 1):
+            if placed == enemies:
+                break
+            data[row - 1][col] = 16
+            placed += 1
+    data[ROWS - 2][COLS - 1] = 20  # Exit
+    return levels.from_rows(data)
+
+
+class StressSpawner:
+    """Class that keeps a stress level full of bullets and grenades"""
+
+    def __init__(self, bullets, grenades, seed):
+        """Constructor
+
+        Args:
+            bullets (integer): bullets to keep in flight
+            grenades (integer): grenades to keep in flight
+            seed (integer): seed for the spawn positions
+        """
+        self.bullets = bullets
+        self.grenades = grenades
+        self.random = random.Random(seed)
+
+    def spawn(self, world):
+        """Tops up the bullets and grenades around the camera
+
+        Args:
+            world (World): world to spawn into
+        """
+        left = world.camera.x
+        while len(world.bullet_group) < self.bullets:
+            bullet = shooter.Bullet(
+                world,
+                self.random.randint(left, left + shooter.SCREEN_WIDTH),
+                self.random.randint(0, ROWS - 2) * TILE_SIZE + TILE_SIZE // 2,
+                self.random.choice((-1, 1)),
+            )
+            world.bullet_group.add(bullet)
+        while len(world.grenade_group) < self.grenades:
+            shooter.grenade_pool.acquire(
+                world.grenade_group,
+                world,
+                self.random.randint(left, left + shooter.SCREEN_WIDTH),
+                self.random.randint(0, ROWS - 2) * TILE_SIZE,
+                self.random.choice((-1, 1)),
+            )
+
+
+def run_scenario(name, game, frames, inputs, spawner=None, immortal=False):
+    """Plays a scenario headlessly, timing every frame and its phases
+
+    Args:
+        name (string): scenario name
+        game (Game): game to play
+        frames (integer): frames to play
+        inputs (function): returns the Inputs for a frame number
+        spawner (StressSpawner, optional): extra projectiles. Defaults to None.
+        immortal (boolean, optional): keep the player alive. Defaults to False.
+
+    Returns:
+        dict: scenario results
+    """
+    timer = PhaseTimer()
+    game.profiler = timer
+    surface = shooter.screen
+    restarts = 0
+    # Frames actually stepped, the game may complete before frames
+    played = 0
+    start = time.perf_counter()
+    for frame in range(frames):
+        if game.completed:
+            break
+        if spawner is not None:
+            spawner.spawn(game.world)
+        if immortal:
+            game.world.player.health = game.world.player.max_health
+        game.step(inputs(frame))
+        played += 1
+        game.draw(surface)
+        if not game.world.player.alive:
+            game.restart_level()
+            restarts += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "name": name,
+        "frames": played,
+        "seconds": round(elapsed, 4),
+        "fps": round(played / elapsed, 1) if elapsed else None,
+        "restarts": restarts,
+        "enemies": len(game.world.enemy_group),
+        "phases": timer.report(played),
+    }
+
+
+def stress_inputs(frame):
+    """Player input for the stress scenario: stays still and keeps shooting
+
+    Args:
+        frame (integer): frame number
+
+    Returns:
+        Inputs: player input for the frame
+    """
+    return Inputs(shoot=True)
+
+
+def main():
+    """Runs the benchmark scenarios and writes the results as JSON"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Elite Soldier game loop headlessly"
+    )
+    parser.add_argument(
+        "--frames", type=int, default=1000, help="frames per scenario"
+    )
+    parser.add_argument(
+        "--enemies", type=int, default=300, help="enemies in the stress level"
+    )
+    parser.add_argument(
+        "--bullets", type=int, default=200, help="bullets in the stress level"
+    )
+    parser.add_argument(
+        "--grenades",
+        type=int,
+        default=100,
+        help="grenades in the stress level",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1, help="seed of every scenario's game"
+    )
+    parser.add_argument(
+        "--batch-enemies",
+        action="store_true",
+        help="run the enemy AI in batch with the NumPy enemy manager",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=["level1", "level2", "level3", "stress"],
+        help="scenario to run, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--output", help="file to write the JSON results to (default: stdout)"
+    )
+    args = parser.parse_args()
+    scenarios = args.scenario or ["level1", "level2", "level3", "stress"]
+
+    # Everything is loaded up front, from here on any image read from disk
+    # happens mid-game and is counted in gameplay_disk_loads
+    shooter.startup.finish()
+    assets.begin_gameplay()
+    results = []
+    for name in scenarios:
+        if name == "stress":
+            game = Game(batch_enemies=args.batch_enemies, seed=args.seed)
+            game.load_world(stress_level(args.enemies))
+            spawner = StressSpawner(args.bullets, args.grenades, args.seed)
+            results.append(
+                run_scenario(
+                    name, game, args.frames, stress_inputs, spawner, True
+                )
+            )
+        else:
+            game = Game(
+                int(name[-1]), batch_enemies=args.batch_enemies, seed=args.seed
+            )
+            results.append(
+                run_scenario(
+                    name, game, args.frames, headless.scripted_inputs
+                )
+            )
+
+    report = {
+        "python": sys.version.split()[0],
+        "pygame": shooter.pygame.version.ver,
+        "platform": platform.platform(),
+        "batch_enemies": args.batch_enemies,
+        "gameplay_disk_loads": assets.stats["gameplay_disk_loads"],
+        "startup": shooter.startup.report(),
+        "grenade_pool": shooter.grenade_pool.stats,
+        "explosion_pool": shooter.explosion_pool.stats,
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+    shooter.pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
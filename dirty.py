@@ -0,0 +1,66 @@
+import pygame
+
+
+class DirtyTracker:
+    """Class that pushes only the changed parts of the screen to the display
+
+    Every frame the regions drawn differently from the previous frame are
+    added, and present updates them together with the regions added the
+    frame before, so whatever was drawn there last frame is cleared too.
+    Anything that changes the whole screen has to call invalidate instead.
+    When disabled, present always updates the whole display.
+    """
+
+    def __init__(self, enabled=True):
+        """Constructor
+
+        Args:
+            enabled (boolean, optional): update only the changed regions.
+                Defaults to True.
+        """
+        self.enabled = enabled
+        self.rects = []
+        self.previous = []
+        # The first frame always goes to the display in full
+        self.full = True
+        # Whatever the screen was last drawn from, see changed
+        self.source = None
+
+    def add(self, rect):
+        """Marks a region of the screen as changed in this frame
+
+        Args:
+            rect (Rect): region in screen coordinates
+        """
+        if self.enabled:
+            self.rects.append(rect)
+
+    def invalidate(self):
+        """Marks the whole screen as changed in this frame"""
+        self.full = True
+
+    def changed(self, source):
+        """Invalidates the screen when it is drawn from something new
+
+        Args:
+            source (object): value identifying what the screen shows, such
+                as the current scene or the camera position
+
+        Returns:
+            boolean: True if source is different from the last frame
+        """
+        if source == self.source:
+            return False
+        self.source = source
+        self.invalidate()
+        return True
+
+    def present(self):
+        """Updates the display with the changes of this frame"""
+        if self.full or not self.enabled:
+            pygame.display.update()
+        else:
+            pygame.display.update(self.previous + self.rects)
+        self.previous = self.rects
+        self.rects = []
+        self.full = False
@@ -0,0 +1,270 @@
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is only needed when the enemy manager is used
+    np = None
+
+# Action numbers shared with Soldier.update_action
+IDLE = 0
+RUN = 1
+
+
+def round_half_away(values):
+    """Rounds like assigning a float to a pygame Rect attribute
+
+    Soldier.ai rounds this way when it centres the vision rectangle.
+    Soldier.move truncates positions instead.
+
+    Args:
+        values (ndarray): float values
+
+    Returns:
+        ndarray: values rounded half away from zero, as integers
+    """
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int64)
+
+
+class EnemyManager:
+    """Class that runs the AI of every enemy of a world in batch
+
+    Positions, directions, vision rectangles and AI timers live in NumPy
+    arrays and every step of Soldier.ai (idle rolls, vision checks, patrol
+    moves with their tile collisions and turnarounds) is evaluated for all
+    enemies at once. The Soldier objects stay as views for rendering, bullet
+    hits and shooting: their rectangle, direction and flip are written back
+    after each step.
+
+    The idle rolls come from a NumPy generator seeded from the random
+    module, so they are reproducible but differ from the ones Soldier.ai
+    draws. Everything else gives the same result as Soldier.ai.
+    """
+
+    def __init__(self, world, tile_size, gravity, floor):
+        """Constructor
+
+        Args:
+            world (World): world whose enemies are managed
+            tile_size (integer): tile width and height
+            gravity (float): vertical speed gained every frame
+            floor (integer): y coordinate below which soldiers die
+        """
+        if np is None:
+            raise ImportError("The enemy manager requires NumPy")
+        self.world = world
+        self.tile_size = tile_size
+        self.gravity = gravity
+        self.floor = floor
+        self.soldiers = list(world.enemy_group)
+        soldiers = self.soldiers
+
+        def column(values, dtype=np.int64):
+            return np.array(list(values), dtype=dtype)
+
+        self.x = column(s.rect.x for s in soldiers)
+        self.y = column(s.rect.y for s in soldiers)
+        self.width = column(s.width for s in soldiers)
+        self.height = column(s.height for s in soldiers)
+        self.speed = column(s.speed for s in soldiers)
+        self.direction = column(s.direction for s in soldiers)
+        self.vel_y = column((s.vel_y for s in soldiers), np.float64)
+        self.action = column(s.action for s in soldiers)
+        self.vision_x = column(s.vision.x for s in soldiers)
+        self.vision_y = column(s.vision.y for s in soldiers)
+        self.vision_width = column(s.vision.width for s in soldiers)
+        self.vision_height = column(s.vision.height for s in soldiers)
+        self.idling = column((s.idling for s in soldiers), bool)
+        self.idling_counter = column(s.idling_counter for s in soldiers)
+        self.move_counter = column(s.move_counter for s in soldiers)
+        self.rng = np.random.default_rng(random.getrandbits(64))
+
+        # Obstacle and water tiles as grids of booleans, by [row, column]
+        rows = len(world.obstacle_grid)
+        grid = world.obstacle_grid
+        self.solid = np.array(
+            [[tile is not None for tile in row] for row in grid], dtype=bool
+        ).reshape(rows, world.level_length)
+        water = np.zeros(self.solid.shape, dtype=np.int64)
+        for sprite in world.water_group:
+            water[sprite.rect.y // tile_size, sprite.rect.x // tile_size] = 1
+        # Water tiles above and left of each cell, to count the water tiles
+        # of any block of cells with four lookups
+        self.water_sum = np.zeros((rows + 1, world.level_length + 1), np.int64)
+        self.water_sum[1:, 1:] = water.cumsum(0).cumsum(1)
+
+    def update(self):
+        """Runs one frame of AI for every living enemy"""
+        player = self.world.player
+        count = len(self.soldiers)
+        if count == 0 or not player.alive:
+            return
+        active = np.fromiter(
+            (s.alive for s in self.soldiers), dtype=bool, count=count
+        )
+        # Action each enemy switches to this frame, -1 to keep its own
+        target = np.full(count, -1)
+
+        # Start idling once in a while
+        rolls = self.rng.integers(1, 201, count)
+        rolled = active & ~self.idling & (rolls == 1)
+        self.idling |= rolled
+        self.idling_counter[rolled] = 50
+        target[rolled] = IDLE
+
+        # Enemies that see the player stop and shoot
+        rect = player.rect
+        sees = (
+            active
+            & (self.vision_x < rect.right)
+            & (rect.x < self.vision_x + self.vision_width)
+            & (self.vision_y < rect.bottom)
+            & (rect.y < self.vision_y + self.vision_height)
+        )
+        target[sees] = IDLE
+
+        # The rest either count down their idle time or patrol
+        idle = active & ~sees & self.idling
+        patrolling = active & ~sees & ~self.idling
+        self.idling_counter[idle] -= 1
+        self.idling[idle & (self.idling_counter <= 0)] = False
+        flips = self.direction == -1
+        self.move(patrolling)
+        target[patrolling] = RUN
+        self.move_counter[patrolling] += 1
+        # Update ai vision as the enemy moves
+        center_x = self.x + self.width // 2
+        center_y = self.y + self.height // 2
+        vision_x = (
+            round_half_away(
+                center_x + self.vision_width / 2 * self.direction
+            )
+            - self.vision_width // 2
+        )
+        vision_y = center_y - self.vision_height // 2
+        self.vision_x = np.where(patrolling, vision_x, self.vision_x)
+        self.vision_y = np.where(patrolling, vision_y, self.vision_y)
+        turning = patrolling & (self.move_counter > self.tile_size)
+        self.direction[turning] *= -1
+        self.move_counter[turning] *= -1
+
+        # Write the results back to the soldiers
+        soldiers = self.soldiers
+        for i in np.flatnonzero(patrolling).tolist():
+            soldier = soldiers[i]
+            soldier.rect.topleft = (int(self.x[i]), int(self.y[i]))
+            soldier.direction = int(self.direction[i])
+            soldier.flip = bool(flips[i])
+        changed = (target >= 0) & (target != self.action)
+        for i in np.flatnonzero(changed).tolist():
+            soldiers[i].update_action(int(target[i]))
+        self.action = np.where(changed, target, self.action)
+        for i in np.flatnonzero(sees).tolist():
+            soldiers[i].shoot()
+
+    def move(self, moving):
+        """Moves enemies one step forward, colliding with the level tiles
+
+        Args:
+            moving (ndarray): booleans selecting the enemies to move
+        """
+        index = np.flatnonzero(moving)
+        if index.size == 0:
+            return
+        size = self.tile_size
+        x, y = self.x[index], self.y[index]
+        width, height = self.width[index], self.height[index]
+        direction = self.direction[index]
+        move_counter = self.move_counter[index]
+        dx = self.speed[index] * direction
+        vel_y = self.vel_y[index] + self.gravity
+        dy = vel_y.copy()
+
+        # Grid cells around the current and predicted rectangles, with the
+        # same one pixel margin World.get_obstacles uses
+        moved_y = y + np.trunc(dy).astype(np.int64)
+        rows, cols = self.solid.shape
+        first_col = np.maximum((np.minimum(x, x + dx) - 1) // size, 0)
+        last_col = np.minimum(
+            (np.maximum(x, x + dx) + width) // size, cols - 1
+        )
+        first_row = np.maximum((np.minimum(y, moved_y) - 1) // size, 0)
+        last_row = np.minimum(
+            (np.maximum(y, moved_y) + height) // size, rows - 1
+        )
+        span_cols = int((last_col - first_col).max()) + 1
+        span_rows = int((last_row - first_row).max()) + 1
+
+        # Check the tiles in the same order as Soldier.move so that several
+        # collisions in one frame resolve the same way
+        for row_offset in range(span_rows):
+            row = first_row + row_offset
+            tile_y = row * size
+            row_inside = row <= last_row
+            row = np.minimum(row, rows - 1)
+            for col_offset in range(span_cols):
+                col = first_col + col_offset
+                tile = (
+                    row_inside
+                    & (col <= last_col)
+                    & self.solid[row, np.minimum(col, cols - 1)]
+                )
+                if not tile.any():
+                    continue
+                tile_x = col * size
+                # Check collision in the x direction
+                hit_x = (
+                    tile
+                    & (tile_x < x + dx + width)
+                    & (x + dx < tile_x + size)
+                    & (tile_y < y + height)
+                    & (y < tile_y + size)
+                )
+                if hit_x.any():
+                    dx[hit_x] = 0
+                    # If the ai has hit a wall then make it turn around
+                    direction[hit_x] *= -1
+                    move_counter[hit_x] = 0
+                # Check for collision in the y direction
+                test_y = np.trunc(y + dy).astype(np.int64)
+                hit_y = (
+                    tile
+                    & (tile_x < x + width)
+                    & (x < tile_x + size)
+                    & (tile_y < test_y + height)
+                    & (test_y < tile_y + size)
+                )
+                if hit_y.any():
+                    rising = hit_y & (vel_y < 0)
+                    falling = hit_y & ~rising
+                    dy[rising] = (tile_y + size - y)[rising]
+                    dy[falling] = (tile_y - (y + height))[falling]
+                    vel_y[hit_y] = 0
+
+        # Falling into water or off the map kills
+        first_row = np.maximum(y // size, 0)
+        last_row = np.minimum((y + height - 1) // size, rows - 1)
+        first_col = np.maximum(x // size, 0)
+        last_col = np.minimum((x + width - 1) // size, cols - 1)
+        inside = (first_row <= last_row) & (first_col <= last_col)
+        first_row = np.minimum(first_row, rows)
+        first_col = np.minimum(first_col, cols)
+        last_row = np.maximum(last_row, -1)
+        last_col = np.maximum(last_col, -1)
+        water = inside & (
+            self.water_sum[last_row + 1, last_col + 1]
+            - self.water_sum[first_row, last_col + 1]
+            - self.water_sum[last_row + 1, first_col]
+            + self.water_sum[first_row, first_col]
+            > 0
+        )
+        dead = index[water | (y + height > self.floor)]
+        for i in dead.tolist():
+            self.soldiers[i].health = 0
+
+        # Update rectangle position, truncating y like Soldier.move
+        self.x[index] = x + dx
+        self.y[index] = np.trunc(y + dy).astype(np.int64)
+        self.direction[index] = direction
+        self.move_counter[index] = move_counter
+        self.vel_y[index] = vel_y
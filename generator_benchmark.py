@@ -0,0 +1,77 @@
+import argparse
+import time
+
+import generators
+
+
+def throughput(generator, draws, minimum, maximum):
+    # Numbers generated per second through generate_number
+    generate_number = generator.generate_number
+    start = time.perf_counter()
+    for _ in range(draws):
+        generate_number(minimum, maximum)
+    return draws / (time.perf_counter() - start)
+
+
+def chi_square(generator, draws, minimum, maximum):
+    # Chi-square statistic of the counts of each number against a uniform
+    # distribution; it should be close to the number of possible values
+    # minus one for a good generator
+    counts = [0] * (maximum - minimum + 1)
+    for _ in range(draws):
+        counts[generator.generate_number(minimum, maximum) - minimum] += 1
+    expected = draws / len(counts)
+    return sum((count - expected) ** 2 / expected for count in counts)
+
+
+def serial_correlation(generator, draws, minimum, maximum):
+    # Correlation between consecutive numbers, close to 0 when independent
+    generate_number = generator.generate_number
+    values = [generate_number(minimum, maximum) for _ in range(draws)]
+    mean = sum(values) / draws
+    variance = sum((value - mean) ** 2 for value in values)
+    covariance = sum(
+        (values[i] - mean) * (values[i + 1] - mean) for i in range(draws - 1)
+    )
+    return covariance / variance
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the speed and quality of the generators"
+    )
+    parser.add_argument(
+        "--draws", type=int, default=200000, help="numbers per measurement"
+    )
+    parser.add_argument("--seed", type=int, default=12345, help="seed")
+    parser.add_argument(
+        "--range",
+        type=int,
+        nargs=2,
+        default=[15, 25],
+        metavar=("MIN", "MAX"),
+        help="range of the numbers (default: the health box roll)",
+    )
+    args = parser.parse_args()
+    minimum, maximum = args.range
+
+    print(
+        f"{'generator':<16}{'numbers/sec':>14}{'chi-square':>14}"
+        f"{'serial corr.':>14}"
+    )
+    for name in generators.registry:
+        speed = throughput(
+            generators.create(name, args.seed), args.draws, minimum, maximum
+        )
+        chi = chi_square(
+            generators.create(name, args.seed), args.draws, minimum, maximum
+        )
+        correlation = serial_correlation(
+            generators.create(name, args.seed), args.draws, minimum, maximum
+        )
+        print(f"{name:<16}{speed:>14,.0f}{chi:>14.1f}{correlation:>14.4f}")
+    print(f"Degrees of freedom: {maximum - minimum}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+from lehmer import Lehmer
+from linear_congruential import LinearCongruential
+from middle_square import MiddleSquare
+from multiplicative_congruential import MultiplicativeCongruential
+from pcg import PCG
+from xorshift import Xorshift
+
+# Generator classes by name. Every class takes an optional seed and has
+# generate_number(minimum, maximum) returning an integer in that range
+registry = {
+    "linear": LinearCongruential,
+    "multiplicative": MultiplicativeCongruential,
+    "middle_square": MiddleSquare,
+    "lehmer": Lehmer,
+    "xorshift": Xorshift,
+    "pcg": PCG,
+}
+
+
+def register(name, generator_class):
+    # Add a generator class, or replace the one registered under name
+    registry[name] = generator_class
+
+
+def create(name, seed=None):
+    # New generator of the class registered under name
+    if name not in registry:
+        raise ValueError(
+            f"Unknown generator {name!r}, expected one of {sorted(registry)}"
+        )
+    return registry[name](seed)
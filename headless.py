@@ -0,0 +1,137 @@
+import argparse
+import os
+import time
+
+# Use SDL's dummy drivers: no window, no audio device, nothing is presented
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# Keep stdout machine readable, pygame prints a banner when imported
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import profiler  # noqa: E402
+import replay  # noqa: E402
+import shooter  # noqa: E402
+from shooter import Game, Inputs  # noqa: E402
+
+
+def scripted_inputs(frame):
+    """Simple scripted player: runs right, jumps and shoots periodically
+
+    Args:
+        frame (integer): frame number
+
+    Returns:
+        Inputs: player input for the frame
+    """
+    return Inputs(
+        moving_right=True,
+        jump=frame % 40 == 0,
+        shoot=frame % 30 < 5,
+        grenade=frame % 100 < 5,
+    )
+
+
+def run(game, frames, inputs=scripted_inputs):
+    """Steps a game as fast as possible without rendering
+
+    Args:
+        game (Game): game to advance
+        frames (integer): number of frames to simulate
+        inputs (function, optional): returns the Inputs for a frame number.
+            Defaults to scripted_inputs.
+
+    Returns:
+        integer: number of frames actually simulated
+    """
+    for frame in range(frames):
+        if game.completed:
+            return frame
+        game.step(inputs(frame))
+        # Restart as soon as the player dies, there is no death screen
+        if not game.world.player.alive:
+            game.restart_level()
+    return frames
+
+
+def play(recording, frame_profiler=None):
+    """Plays a recorded session back as fast as possible without rendering
+
+    Args:
+        recording (Recording): recorded session
+        frame_profiler (FrameProfiler, optional): profiler timing the phases
+            of every frame. Defaults to None.
+
+    Returns:
+        Game: game in the state the session ended in
+    """
+    game = Game(
+        recording.level,
+        preload=recording.preload,
+        batch_enemies=recording.batch_enemies,
+        seed=recording.seed,
+    )
+    if game.seeds != recording.seeds:
+        game.close()
+        raise ValueError("The replay was recorded with a different game")
+    game.profiler = frame_profiler
+    for mask in recording.masks():
+        if mask & replay.RESTART:
+            game.restart_level()
+        game.step(Inputs(*replay.decode(mask)))
+    return game
+
+
+def main():
+    """Runs a headless simulation from the command line"""
+    parser = argparse.ArgumentParser(
+        description="Run Elite Soldier headless as fast as possible"
+    )
+    parser.add_argument("--level", type=int, default=1, help="level to play")
+    parser.add_argument(
+        "--frames", type=int, default=10000, help="frames to simulate"
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="play back a recorded session instead of the scripted player",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="FILE",
+        help="write the phase times of every frame to a file",
+    )
+    parser.add_argument(
+        "--profile-format",
+        choices=["json", "chrome"],
+        default="json",
+        help="format of the profile output (default: json)",
+    )
+    args = parser.parse_args()
+
+    frame_profiler = None
+    start = time.perf_counter()
+    if args.replay:
+        recording = replay.load(args.replay)
+        if args.profile_output:
+            frame_profiler = profiler.FrameProfiler(max(len(recording), 1))
+        game = play(recording, frame_profiler)
+        frames = len(recording)
+    else:
+        game = Game(args.level)
+        if args.profile_output:
+            frame_profiler = profiler.FrameProfiler(max(args.frames, 1))
+            game.profiler = frame_profiler
+        frames = run(game, args.frames)
+    elapsed = time.perf_counter() - start
+    game.close()
+    if frame_profiler is not None:
+        frame_profiler.export(args.profile_output, args.profile_format)
+    print(
+        f"Simulated {frames} frames in {elapsed:.2f}s "
+        f"({frames / elapsed:.0f} frames/sec), level {game.level}"
+    )
+    shooter.pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import time
+
+# Time the game was launched at. shooter.py imports this module before any
+# other, so this is taken before pygame and the game modules are imported
+STARTED = time.perf_counter()
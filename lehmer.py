@@ -0,0 +1,40 @@
+import time
+
+
+class Lehmer:
+    def __init__(self, seed=None):
+        # Multiplier of the minimal standard multiplicative generator
+        self.multiplier = 48271
+        # Prime modulus, the generator visits every value from 1 to modulus - 1
+        self.modulus = 2**31 - 1
+        # Schrage's decomposition of the modulus: modulus = multiplier * q + r
+        self.q = self.modulus // self.multiplier
+        self.r = self.modulus % self.multiplier
+        # Generate initial seed based on current time unless one is given,
+        # zero is the one state the generator can never leave
+        if seed is None:
+            seed = int(time.time())
+        self.seed = seed % self.modulus or 1
+
+    def next_state(self):
+        # Schrage's method computes multiplier * seed % modulus without any
+        # intermediate value exceeding the modulus, so the same code works
+        # with 32 bit arithmetic
+        seed = self.seed
+        seed = self.multiplier * (seed % self.q) - self.r * (seed // self.q)
+        if seed <= 0:
+            seed += self.modulus
+        self.seed = seed
+        return seed
+
+    def generate_number(self, minimum, maximum):
+        # States are uniform over modulus - 1 values: draw again when the
+        # state falls in the incomplete last block of the range, which would
+        # otherwise make the lowest numbers more likely
+        range_val = maximum - minimum + 1
+        count = self.modulus - 1
+        limit = count - count % range_val
+        value = self.next_state() - 1
+        while value >= limit:
+            value = self.next_state() - 1
+        return minimum + value % range_val
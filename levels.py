@@ -0,0 +1,165 @@
+import csv
+import hashlib
+import mmap
+import os
+import struct
+
+# Compiled levels live next to the sources, in a directory ignored by git
+CACHE_DIR = "cache/levels"
+# File header: magic, format version, rows, columns, number of tiles and the
+# sha256 of the csv the level was compiled from
+MAGIC = b"ESLV"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHI32s")
+# One record per non-empty cell: column, row and tile type
+TILE = struct.Struct("<HBb")
+
+# Levels already loaded, keyed by csv path, with the csv (mtime, size)
+loaded = {}
+
+
+class Level:
+    """Class that represents the non-empty tiles of a level
+
+    The tiles are read straight from a memory mapped compiled file, so a level
+    costs a few bytes per tile instead of a Python int per cell.
+    """
+
+    def __init__(self, rows, cols, records):
+        """Constructor
+
+        Args:
+            rows (integer): number of rows
+            cols (integer): number of columns
+            records (bytes-like): packed TILE records
+        """
+        self.rows = rows
+        self.cols = cols
+        self.records = records
+
+    def tiles(self):
+        """Iterates through the non-empty tiles
+
+        Returns:
+            iterator[tuple]: (x, y, tile) of every non-empty cell, row by row
+        """
+        return TILE.iter_unpack(self.records)
+
+    def __len__(self):
+        """Number of non-empty tiles"""
+        return len(self.records) // TILE.size
+
+
+def from_rows(data):
+    """Creates a level from a list of rows of tile values
+
+    Args:
+        data (list[][]): tile values by row and column, -1 for empty cells
+
+    Returns:
+        Level: level with the non-empty cells of data
+    """
+    records = bytearray()
+    for y, row in enumerate(data):
+        for x, tile in enumerate(row):
+            if tile >= 0:
+                records += TILE.pack(x, y, tile)
+    return Level(len(data), len(data[0]), bytes(records))
+
+
+def compile_level(source, target):
+    """Compiles a level csv into the binary level format
+
+    Args:
+        source (string): csv file path
+        target (string): compiled file path
+    """
+    with open(source, "rb") as file:
+        content = file.read()
+    rows = list(csv.reader(content.decode().splitlines(), delimiter=","))
+    level = from_rows([[int(tile) for tile in row] for row in rows])
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        level.rows,
+        level.cols,
+        len(level),
+        hashlib.sha256(content).digest(),
+    )
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write to a temporary file first so a reader never sees half a level,
+    # one per process since several processes may compile at the same time
+    temporary = f"{target}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(header + level.records)
+    os.replace(temporary, target)
+
+
+def open_compiled(source, target):
+    """Maps a compiled level if it is up to date with its csv
+
+    Args:
+        source (string): csv file path
+        target (string): compiled file path
+
+    Returns:
+        Level: mapped level, None if missing, outdated or invalid
+    """
+    if not os.path.exists(target):
+        return None
+    with open(target, "rb") as file:
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            return None
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, rows, cols, count, checksum = HEADER.unpack_from(data)
+    with open(source, "rb") as file:
+        current = hashlib.sha256(file.read()).digest()
+    if (
+        magic != MAGIC
+        or version != VERSION
+        or checksum != current
+        or len(data) != HEADER.size + count * TILE.size
+    ):
+        data.close()
+        return None
+    return Level(rows, cols, memoryview(data)[HEADER.size:])
+
+
+def load(level):
+    """Loads a level, compiling its csv first when needed
+
+    Every level load goes through here. Reloading an unchanged level returns
+    the level already mapped in memory.
+
+    Args:
+        level (integer): level number
+
+    Returns:
+        Level: level tiles
+    """
+    source = f"level{level}_data.csv"
+    stat = os.stat(source)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = loaded.get(source)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    target = os.path.join(CACHE_DIR, f"level{level}.lvl")
+    data = open_compiled(source, target)
+    if data is None:
+        compile_level(source, target)
+        data = open_compiled(source, target)
+    loaded[source] = (version, data)
+    return data
+
+
+def main():
+    """Compiles every level csv in the current directory"""
+    level = 1
+    while os.path.exists(f"level{level}_data.csv"):
+        data = load(level)
+        print(f"level {level}: {data.rows}x{data.cols}, {len(data)} tiles")
+        level += 1
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,132 @@
 import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, batches fall back to array.array without it
+    np = None
+
+
+def lcg_states(seed, n, multiplier, increment, modulus):
+    # Return the n states following seed for the congruential formula
+    if np is None or modulus > 2**32 or modulus & (modulus - 1):
+        states = array("q")
+        for _ in range(n):
+            seed = (multiplier * seed + increment) % modulus
+            states.append(seed)
+        return states
+    states = np.empty(n, dtype=np.uint64)
+    if n == 0:
+        return states
+    states[0] = (multiplier * seed + increment) % modulus
+    # Coefficients of the formula applied size times: x -> a * x + c
+    a, c = multiplier, increment
+    size = 1
+    while size < n:
+        # Each state is the one size positions earlier stepped size times,
+        # so every pass doubles the number of states computed. Products
+        # wrap around 2**64, which a power of two modulus divides exactly
+        count = min(size, n - size)
+        states[size : size + count] = (
+            states[:count] * np.uint64(a) + np.uint64(c)
+        ) & np.uint64(modulus - 1)
+        c = (a * c + c) % modulus
+        a = a * a % modulus
+        size *= 2
+    return states
+
+
+def affine_power(multiplier, increment, modulus, k):
+    # Coefficients (a, c) of the congruential formula applied k times,
+    # x -> a * x + c, found by repeated squaring of the formula
+    a, c = 1, 0
+    step_a, step_c = multiplier % modulus, increment % modulus
+    while k > 0:
+        if k & 1:
+            a, c = a * step_a % modulus, (c * step_a + step_c) % modulus
+        step_c = (step_a * step_c + step_c) % modulus
+        step_a = step_a * step_a % modulus
+        k >>= 1
+    return a, c
+
+
+def reduce_states(states, minimum, maximum):
+    # Map states to the range of values like generate_number does
+    range_val = maximum - minimum + 1
+    if np is None or not isinstance(states, np.ndarray):
+        return array("q", (minimum + state % range_val for state in states))
+    return (states % np.uint64(range_val)).astype(np.int64) + minimum
+
+
+def scale_states(states, minimum, maximum, modulus):
+    # Map states to the range of values from their high bits, like
+    # LinearCongruential.generate_number does. The low bits of a power of two
+    # modulus generator repeat with short periods, the high bits do not
+    range_val = maximum - minimum + 1
+    if np is None or not isinstance(states, np.ndarray) or range_val > 2**32:
+        return array(
+            "q",
+            (minimum + int(state) * range_val // modulus for state in states),
+        )
+    # lcg_states only returns arrays for power of two moduli up to 2**32, so
+    # the product fits in 64 bits and the division is a shift
+    shift = np.uint64(modulus.bit_length() - 1)
+    scaled = (states * np.uint64(range_val)) >> shift
+    return scaled.astype(np.int64) + minimum
 
 
 class LinearCongruential:
-    def __init__(self):
+    def __init__(self, seed=None):
         # Multiplier for the congruential formula
         self.multiplier = 1664525
         # Increment for the congruential formula
         self.increment = 1013904223
         # Modulus for the congruential formula
         self.modulus = 2**32
-        # Generate initial seed based on current time
-        self.seed = int(time.time()) % self.modulus
+        # Generate initial seed based on current time unless one is given
+        if seed is None:
+            seed = int(time.time())
+        self.seed = seed % self.modulus
 
     def generate_number(self, minimum, maximum):
         # Update seed using congruential formula
         self.seed = (self.multiplier * self.seed + self.increment) % self.modulus
-        # Calculate the range of values based on the given minimum and maximum
-        pseudo_random_number = minimum + (self.seed % (maximum - minimum + 1))
+        # Scale the seed to the range of values based on the given minimum and
+        # maximum, so the result comes from its high bits
+        range_val = maximum - minimum + 1
+        pseudo_random_number = minimum + self.seed * range_val // self.modulus
         return pseudo_random_number
+
+    def generate_numbers(self, n, minimum, maximum):
+        # Generate the same n numbers as n calls to generate_number at once
+        states = lcg_states(
+            self.seed, n, self.multiplier, self.increment, self.modulus
+        )
+        if n > 0:
+            self.seed = int(states[-1])
+        return scale_states(states, minimum, maximum, self.modulus)
+
+    def advance(self, k):
+        # Skip the next k numbers in O(log k) steps
+        a, c = affine_power(
+            self.multiplier, self.increment, self.modulus, k % self.modulus
+        )
+        self.seed = (a * self.seed + c) % self.modulus
+
+    def split(self, n):
+        # Split the rest of the period into n consecutive, non-overlapping
+        # streams. Stream i starts i * stride numbers ahead, so the streams
+        # read one after the other give the same numbers as this one. The
+        # stride is odd: with a power of two stride the low bits of every
+        # stream would be the same, as bit k repeats every 2**(k + 1) numbers.
+        # It is rounded down, so the n streams fit in one period
+        stride = self.modulus // n
+        if stride % 2 == 0:
+            stride -= 1
+        streams = []
+        for i in range(n):
+            stream = LinearCongruential(self.seed)
+            stream.advance(i * stride)
+            streams.append(stream)
+        return streams
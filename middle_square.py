@@ -1,37 +1,154 @@
 import time
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, batches fall back to array.array without it
+    np = None
+
+# Number of possible 4 digit states
+STATES = 10000
+
+# Middle 4 digits of the 8 digit square of every 4 digit state, so stepping
+# the generator is a single list lookup instead of string manipulation
+TRANSITIONS = array(
+    "H", (state * state // 100 % STATES for state in range(STATES))
+)
+
+# Path followed by a state when it is squared over and over: tail_length
+# steps before it enters its cycle, cycle_length states in the cycle and the
+# cycle states themselves, starting from the one the tail enters. This only
+# describes the classic map from a state to its middle square: MiddleSquare
+# steps its seed by one instead, so its stream goes through all STATES
+# seeds before repeating whatever seed it starts from
+Orbit = namedtuple("Orbit", ["tail_length", "cycle_length", "cycle"])
+
+
+def orbit(seed):
+    # Follow the middle square sequence of seed until a state repeats
+    position = {}
+    state = seed % STATES
+    path = []
+    while state not in position:
+        position[state] = len(path)
+        path.append(state)
+        state = TRANSITIONS[state]
+    tail_length = position[state]
+    cycle = tuple(path[tail_length:])
+    return Orbit(tail_length, len(cycle), cycle)
+
+
+def orbits():
+    # Orbit of every state, sharing the work between states on the same path
+    result = [None] * STATES
+    for seed in range(STATES):
+        if result[seed] is not None:
+            continue
+        # Walk until reaching a state already analysed or repeating one
+        position = {}
+        path = []
+        state = seed
+        while result[state] is None and state not in position:
+            position[state] = len(path)
+            path.append(state)
+            state = TRANSITIONS[state]
+        if result[state] is None:
+            # The walk closed a new cycle, whose states have no tail
+            start = position[state]
+            cycle = tuple(path[start:])
+            for index, member in enumerate(cycle):
+                rotated = cycle[index:] + cycle[:index]
+                result[member] = Orbit(0, len(cycle), rotated)
+            path = path[:start]
+            state = cycle[0]
+        # States before it are one step further from the cycle each
+        known = result[state]
+        for distance, member in enumerate(reversed(path), 1):
+            result[member] = Orbit(
+                known.tail_length + distance, known.cycle_length, known.cycle
+            )
+    return result
+
+
+def fixed_points():
+    # States whose middle square is the state itself
+    return [state for state in range(STATES) if TRANSITIONS[state] == state]
 
 
 class MiddleSquare:
-    def __init__(self):
+    def __init__(self, seed=None):
         # Initialize the SquareMiddle class
-        # Generate the initial seed based on the current time
-        self.seed = int(time.time()) % 10000
-        # Convert the seed to a string representation and pad it with leading zeros if necessary
-        self.seed_str = str(self.seed).zfill(4)
+        # Generate the initial seed based on the current time unless one is
+        # given
+        if seed is None:
+            seed = int(time.time())
+        self.seed = seed % STATES
         # Set the cycle size to represent the full range of possible seed values
-        self.cycle_size = 10000
+        self.cycle_size = STATES
 
-    def generate_number(self, minimum, maximum):
-        # Generate a pseudo-random integer between a given minimum and maximum using the square middle method
+    @property
+    def seed_str(self):
+        # The seed as a string padded with leading zeros to 4 digits
+        return str(self.seed).zfill(4)
 
-        # Generate the square of the seed and convert it to a string
-        square = str(int(self.seed_str) ** 2)
+    @seed_str.setter
+    def seed_str(self, value):
+        self.seed = int(value)
 
-        # Fill the square with leading zeros to ensure it has 8 digits
-        square = square.zfill(8)
+    def generate_number(self, minimum, maximum):
+        # Generate a pseudo-random integer between a given minimum and maximum
+        # using the square middle method
 
-        # Extract the middle 4 digits from the square
-        middle = square[2:6]
-        self.seed_str = middle
+        # Look up the middle 4 digits of the square of the seed
+        middle = TRANSITIONS[self.seed]
 
         # Calculate the range of values based on the given minimum and maximum
         range_val = maximum - minimum + 1
 
-        # Generate the pseudo-random number by taking the modulus of the middle digits with the range and adding the minimum
-        pseudo_random_number = int(middle) % range_val + minimum
+        # Generate the pseudo-random number by taking the modulus of the
+        # middle digits with the range and adding the minimum
+        pseudo_random_number = middle % range_val + minimum
 
         # Update the seed for the next iteration
         self.seed = (self.seed + 1) % self.cycle_size
-        self.seed_str = str(self.seed).zfill(4)
 
         return pseudo_random_number
+
+    def generate_numbers(self, n, minimum, maximum):
+        # Generate the same n numbers as n calls to generate_number at once
+
+        # Every call squares the current seed and then increments it, so the
+        # k-th number only depends on seed + k
+        range_val = maximum - minimum + 1
+        if np is None:
+            numbers = array("q")
+            for k in range(n):
+                middle = TRANSITIONS[(self.seed + k) % self.cycle_size]
+                numbers.append(middle % range_val + minimum)
+        else:
+            seeds = np.arange(self.seed, self.seed + n, dtype=np.int64)
+            seeds %= self.cycle_size
+            middle = seeds * seeds // 100 % STATES
+            numbers = middle % range_val + minimum
+
+        # Update the seed as n calls would have
+        self.seed = (self.seed + n) % self.cycle_size
+
+        return numbers
+
+
+if __name__ == "__main__":
+    # Summarise the cycles of the middle square sequence over every seed
+    all_orbits = orbits()
+    print(f"Fixed points: {fixed_points()}")
+    cycles = {}
+    for state, state_orbit in enumerate(all_orbits):
+        cycles.setdefault(min(state_orbit.cycle), []).append(state_orbit)
+    for start, members in sorted(cycles.items()):
+        longest = max(member.tail_length for member in members)
+        print(
+            f"Cycle through {start:04d}: length {members[0].cycle_length}, "
+            f"{len(members)} seeds reach it, longest tail {longest}"
+        )
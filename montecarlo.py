@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import headless
+import shooter
+from shooter import FPS, MAX_LEVELS, SCREEN_HEIGHT, Game, Inputs
+
+
+def episode_seed(seed, index):
+    """Derives the seed of an episode from the run seed and its index
+
+    The seed only depends on these two numbers, so an episode plays the same
+    whichever worker runs it and however many workers there are.
+
+    Args:
+        seed (integer): seed of the whole run
+        index (integer): episode number
+
+    Returns:
+        integer: 64 bit episode seed
+    """
+    digest = hashlib.sha256(f"{seed}:{index}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def random_bot(seed):
+    """Creates a bot that holds random inputs for random lengths of time
+
+    Args:
+        seed (integer): seed for the bot decisions
+
+    Returns:
+        function: returns the Inputs for a frame number
+    """
+    source = random.Random(seed)
+    state = {"inputs": Inputs(), "until": 0}
+
+    def inputs(frame):
+        if frame >= state["until"]:
+            # Mostly run right, the exit is always at the end of the level
+            state["inputs"] = Inputs(
+                moving_left=source.random() < 0.15,
+                moving_right=source.random() < 0.8,
+                jump=source.random() < 0.3,
+                shoot=source.random() < 0.4,
+                grenade=source.random() < 0.05,
+            )
+            state["until"] = frame + source.randint(5, 40)
+        return state["inputs"]
+
+    return inputs
+
+
+def has_ground(world, rect, depth):
+    """Checks for obstacles right below a rectangle
+
+    Args:
+        world (World): world to look in
+        rect (Rect): area standing on the ground
+        depth (integer): how far below the rectangle to look, in pixels
+
+    Returns:
+        boolean: an obstacle is less than depth pixels below the rectangle
+    """
+    area = shooter.pygame.Rect(rect.x, rect.bottom, rect.width, depth)
+    return any(tile.colliderect(area) for tile in world.get_obstacles(area))
+
+
+def progress_bot(game):
+    """Creates a bot that runs right and jumps over what is in its way
+
+    The bot jumps when it stops moving, as it ran into a wall, or when its
+    next step would leave the ground. In the air, it stops moving on the
+    way down rather than overshoot the last ground below it.
+
+    Args:
+        game (Game): game the bot plays, to look at the player and the level
+
+    Returns:
+        function: returns the Inputs for a frame number
+    """
+    state = {"x": None}
+
+    def inputs(frame):
+        world = game.world
+        player = world.player
+        stuck = player.rect.x == state["x"]
+        state["x"] = player.rect.x
+        ahead = player.rect.move(player.speed, 0)
+        if player.in_air:
+            moving_right = (
+                player.vel_y <= 0
+                or has_ground(world, ahead, SCREEN_HEIGHT)
+                or not has_ground(world, player.rect, SCREEN_HEIGHT)
+            )
+            return Inputs(moving_right=moving_right, shoot=True)
+        return Inputs(
+            moving_right=True,
+            jump=stuck or not has_ground(world, ahead, 1),
+            shoot=True,
+        )
+
+    return inputs
+
+
+def run_episode(task):
+    """Plays one level until the player reaches its exit or time runs out
+
+    The player restarts the level every time it dies.
+
+    Args:
+        task (tuple): level, episode seed, bot name and maximum frames
+
+    Returns:
+        dict: episode results
+    """
+    level, seed, bot, max_frames = task
+    game = Game(level, seed=seed)
+    if bot == "progress":
+        inputs = progress_bot(game)
+    elif bot == "random":
+        inputs = random_bot(seed)
+    else:
+        inputs = headless.scripted_inputs
+    deaths = 0
+    pickups = Counter()
+    completed = False
+    for frame in range(max_frames):
+        # Reaching the exit replaces the world, keep the one played
+        world = game.world
+        completed = game.step(inputs(frame))
+        died = not world.player.alive
+        if completed or died or frame == max_frames - 1:
+            pickups += world.pickups
+        if completed:
+            break
+        if died:
+            deaths += 1
+            game.restart_level()
+    return {
+        "level": level,
+        "completed": completed,
+        "frames": frame + 1,
+        "deaths": deaths,
+        "pickups": dict(pickups),
+    }
+
+
+def summarise(level, episodes):
+    """Aggregates the results of the episodes of one level
+
+    Args:
+        level (integer): level number
+        episodes (list[dict]): episode results
+
+    Returns:
+        dict: level statistics
+    """
+    completed = [e for e in episodes if e["completed"]]
+    times = sorted(e["frames"] / FPS for e in completed)
+    pickups = Counter()
+    for episode in episodes:
+        pickups.update(episode["pickups"])
+    summary = {
+        "level": level,
+        "episodes": len(episodes),
+        "completion_rate": len(completed) / len(episodes),
+        "mean_deaths": statistics.fmean(e["deaths"] for e in episodes),
+        "pickups_per_episode": {
+            item: count / len(episodes)
+            for item, count in sorted(pickups.items())
+        },
+        "time_to_exit": None,
+    }
+    if times:
+        summary["time_to_exit"] = {
+            "mean": statistics.fmean(times),
+            "median": statistics.median(times),
+            "p90": times[min(len(times) - 1, int(len(times) * 0.9))],
+        }
+    return summary
+
+
+def main():
+    """Runs the Monte Carlo playthroughs and prints the aggregated results"""
+    parser = argparse.ArgumentParser(
+        description="Play Elite Soldier levels headlessly many times"
+    )
+    parser.add_argument(
+        "--level",
+        type=int,
+        action="append",
+        help="level to play, can be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--episodes", type=int, default=1000, help="episodes per level"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="run seed")
+    parser.add_argument(
+        "--bot",
+        choices=["progress", "random", "scripted"],
+        default="progress",
+        help="bot",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=120,
+        help="game time an episode can last before it counts as failed",
+    )
+    parser.add_argument("--output", help="file to write the JSON results to")
+    args = parser.parse_args()
+
+    levels = args.level or list(range(1, MAX_LEVELS + 1))
+    max_frames = int(args.max_seconds * FPS)
+    tasks = [
+        (level, episode_seed(args.seed, index), args.bot, max_frames)
+        for level in levels
+        for index in range(args.episodes)
+    ]
+    start = time.perf_counter()
+    # Spawned workers start from a clean interpreter with the dummy drivers
+    context = multiprocessing.get_context("spawn")
+    workers = args.workers or os.cpu_count()
+    chunksize = max(1, len(tasks) // (workers * 8))
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+        results = list(executor.map(run_episode, tasks, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "seed": args.seed,
+        "bot": args.bot,
+        "max_seconds": args.max_seconds,
+        "levels": [
+            summarise(level, [r for r in results if r["level"] == level])
+            for level in levels
+        ],
+    }
+    for summary in report["levels"]:
+        exit_time = summary["time_to_exit"]
+        print(
+            f"Level {summary['level']}: "
+            f"{summary['completion_rate']:.1%} completed, "
+            f"{summary['mean_deaths']:.2f} deaths, "
+            + (
+                f"{exit_time['mean']:.1f}s to exit"
+                if exit_time
+                else "never reached the exit"
+            )
+        )
+    print(f"{len(tasks)} episodes in {elapsed:.1f}s")
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(json.dumps(report, indent=2) + "\n")
+    shooter.pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 import time
 
+from linear_congruential import lcg_states, reduce_states
+
 
 class MultiplicativeCongruential:
-    def __init__(self):
-        # Initialize the seed based on the current time
-        self.seed = int(time.time())
+    def __init__(self, seed=None):
+        # Initialize the seed based on the current time unless one is given
+        if seed is None:
+            seed = int(time.time())
+        self.seed = seed
 
     def generate_number(self, min_value, max_value):
         # Define the constants for the generator
@@ -20,3 +24,10 @@ class MultiplicativeCongruential:
         integer = scaled_value + min_value
 
         return integer
+
+    def generate_numbers(self, n, min_value, max_value):
+        # Generate the same n numbers as n calls to generate_number at once
+        states = lcg_states(self.seed, n, 1664525, 1013904223, 2**32)
+        if n > 0:
+            self.seed = int(states[-1])
+        return reduce_states(states, min_value, max_value)
@@ -0,0 +1,148 @@
+import pygame
+
+# Row states used while splitting a layer into bands
+EMPTY = 0
+HIDDEN = 1
+TRANSLUCENT = 2
+OPAQUE = 3
+
+
+class ParallaxLayer:
+    """Class that represents a background layer scrolling at its own speed"""
+
+    def __init__(self, factor, period, height, images, offset, fill):
+        """Constructor
+
+        Args:
+            factor (float): scroll factor relative to the camera
+            period (integer): width after which the layer repeats itself
+            height (integer): height of the layer
+            images (list[tuple]): images and their (x, y) inside one period
+            offset (float): horizontal offset of the first period
+            fill (tuple): colour behind the images, None for transparent
+        """
+        self.factor = factor
+        self.period = period
+        self.offset = offset
+        # Horizontal strips (image, y) drawn for this layer, set by build
+        self.bands = []
+        self.strip = pygame.Surface((period, height), pygame.SRCALPHA)
+        if fill is not None:
+            self.strip.fill(fill)
+        # Images wider than the period wrap around under the next period
+        for wrap in (-period, 0):
+            for img, (x, y) in images:
+                self.strip.blit(img, (x + wrap, y))
+
+    def row_states(self):
+        """Classifies every row of the strip by its transparency
+
+        Returns:
+            list[integer]: EMPTY, TRANSLUCENT or OPAQUE for each row
+        """
+        width, height = self.strip.get_size()
+        row = pygame.mask.Mask((width, 1), fill=True)
+        # Pixels with any alpha and pixels with full alpha
+        visible = pygame.mask.from_surface(self.strip, 0)
+        solid = pygame.mask.from_surface(self.strip, 254)
+        states = []
+        for y in range(height):
+            if solid.overlap_area(row, (0, y)) == width:
+                states.append(OPAQUE)
+            elif visible.overlap_area(row, (0, y)):
+                states.append(TRANSLUCENT)
+            else:
+                states.append(EMPTY)
+        return states
+
+    def draw(self, surface, scroll):
+        """Draws the layer wrapping around the screen
+
+        Args:
+            surface (Surface): surface to draw on
+            scroll (float): camera scroll
+        """
+        x = -((scroll * self.factor - self.offset) % self.period)
+        screen_width = surface.get_width()
+        for img, y in self.bands:
+            band_x = x
+            # The period is at least as wide as the screen: two blits at most
+            while band_x < screen_width:
+                surface.blit(img, (band_x, y))
+                band_x += self.period
+
+
+class ParallaxBackground:
+    """Class that represents the layered background behind the level"""
+
+    def __init__(self, width, height):
+        """Constructor
+
+        Args:
+            width (integer): screen width
+            height (integer): screen height
+        """
+        self.width = width
+        self.height = height
+        self.layers = []
+
+    def add_layer(self, factor, period, images, offset=0, fill=None):
+        """Adds a layer in front of the previous ones
+
+        Args:
+            factor (float): scroll factor relative to the camera
+            period (integer): width after which the layer repeats itself
+            images (list[tuple]): images and their (x, y) inside one period
+            offset (float, optional): horizontal offset. Defaults to 0.
+            fill (tuple, optional): colour filling the whole layer behind the
+                images. Defaults to None.
+        """
+        if fill is None:
+            height = max(y + img.get_height() for img, (x, y) in images)
+        else:
+            height = self.height
+        self.layers.append(
+            ParallaxLayer(factor, period, height, images, offset, fill)
+        )
+
+    def build(self):
+        """Splits the layers into bands converted to the display format
+
+        Rows hidden behind an opaque row of a layer in front are dropped,
+        fully opaque rows are converted without alpha and the rest keep it.
+        """
+        covered = [False] * self.height
+        for layer in reversed(self.layers):
+            states = layer.row_states()[: self.height]
+            for y, state in enumerate(states):
+                if covered[y] and state != EMPTY:
+                    states[y] = HIDDEN
+            layer.bands = []
+            start = 0
+            for y in range(1, len(states) + 1):
+                if y < len(states) and states[y] == states[start]:
+                    continue
+                if states[start] in (OPAQUE, TRANSLUCENT):
+                    rect = pygame.Rect(0, start, layer.period, y - start)
+                    band = layer.strip.subsurface(rect)
+                    if states[start] == OPAQUE:
+                        band = band.convert()
+                    else:
+                        band = band.convert_alpha()
+                    layer.bands.append((band, start))
+                start = y
+            for y, state in enumerate(states):
+                if state == OPAQUE:
+                    covered[y] = True
+            # The full strip is no longer needed once split into bands
+            layer.strip = None
+
+    def draw(self, surface, scroll):
+        """Draws every layer from back to front
+
+        Args:
+            surface (Surface): surface to draw on
+            scroll (float): camera scroll
+        """
+        for layer in self.layers:
+            layer.draw(surface, scroll)
@@ -0,0 +1,36 @@
+import time
+
+from unbiased import bounded
+
+MASK64 = 2**64 - 1
+# Multiplier of the underlying 64 bit congruential generator
+MULTIPLIER = 6364136223846793005
+
+
+class PCG:
+    def __init__(self, seed=None, stream=0):
+        # Odd increment, each stream is a different sequence
+        self.increment = ((stream << 1) | 1) & MASK64
+        # Generate initial seed based on current time unless one is given
+        if seed is None:
+            seed = time.time_ns()
+        # Standard PCG32 seeding: step, add the seed, step again
+        self.state = 0
+        self.next_uint32()
+        self.state = (self.state + seed) & MASK64
+        self.next_uint32()
+
+    def next_uint32(self):
+        # Step the congruential state and permute the old one into 32 bits
+        # with a xorshift and a rotation chosen by its top bits (XSH RR)
+        old = self.state
+        self.state = (old * MULTIPLIER + self.increment) & MASK64
+        xorshifted = (((old >> 18) ^ old) >> 27) & 0xFFFFFFFF
+        rotation = old >> 59
+        return (
+            (xorshifted >> rotation) | (xorshifted << (-rotation & 31))
+        ) & 0xFFFFFFFF
+
+    def generate_number(self, minimum, maximum):
+        # Unbiased number in the range from the next 32 bit output
+        return minimum + bounded(self.next_uint32, maximum - minimum + 1)
@@ -0,0 +1,84 @@
+class SpritePool:
+    """Class that recycles short lived sprites instead of creating new ones
+
+    Pooled sprite classes take the same arguments in their constructor and
+    in a reset method that brings a used sprite back to its initial state.
+    Sprites go back to the pool through release instead of being killed.
+    Classes whose sprites refer to things a free sprite must not keep alive,
+    such as the world they were used in, drop them in a clear method.
+    """
+
+    def __init__(self, sprite_class, limit):
+        """Constructor
+
+        Args:
+            sprite_class (type): class of the pooled sprites
+            limit (integer): maximum number of free sprites kept for reuse
+        """
+        self.sprite_class = sprite_class
+        self.limit = limit
+        self.free = []
+        # Sprites reused (hits), created (misses), returned to the pool
+        # (releases) and dropped because the pool was full (discards)
+        self.stats = {"hits": 0, "misses": 0, "releases": 0, "discards": 0}
+
+    def acquire(self, group, *args):
+        """Gets a sprite in its initial state and adds it to a group
+
+        Args:
+            group (Group): group the sprite belongs to while in use
+            *args: arguments of the sprite constructor
+
+        Returns:
+            Sprite: reused or new sprite
+        """
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            self.stats["hits"] += 1
+        else:
+            sprite = self.sprite_class(*args)
+            sprite.pool = self
+            self.stats["misses"] += 1
+        group.add(sprite)
+        return sprite
+
+    def release(self, sprite):
+        """Removes a sprite from its groups and keeps it for reuse
+
+        Args:
+            sprite (Sprite): sprite no longer in use
+        """
+        sprite.kill()
+        if len(self.free) < self.limit:
+            clear = getattr(sprite, "clear", None)
+            if clear is not None:
+                clear()
+            self.free.append(sprite)
+            self.stats["releases"] += 1
+        else:
+            self.stats["discards"] += 1
+
+    def prefill(self, count, *args):
+        """Creates free sprites ahead of time, up to the pool limit
+
+        Args:
+            count (integer): number of sprites to create
+            *args: arguments of the sprite constructor
+        """
+        while len(self.free) < min(count, self.limit):
+            sprite = self.sprite_class(*args)
+            sprite.pool = self
+            self.free.append(sprite)
+
+
+def release(sprite):
+    """Returns a sprite to the pool it came from, or kills it if not pooled
+
+    Args:
+        sprite (Sprite): sprite no longer in use
+    """
+    if sprite.pool is None:
+        sprite.kill()
+    else:
+        sprite.pool.release(sprite)
@@ -0,0 +1,268 @@
+import json
+import math
+import time
+from array import array
+from contextlib import contextmanager
+
+import pygame
+
+# Frames kept by default: one minute at 60 FPS
+CAPACITY = 3600
+# Frames between two refreshes of the overlay, the statistics are sorted
+# every time so they are not recomputed on every frame
+OVERLAY_REFRESH = 60
+OVERLAY_COLOUR = (255, 255, 255)
+OVERLAY_BG = (0, 0, 0, 160)
+
+NAN = float("nan")
+
+
+def percentile(values, fraction):
+    """Nearest rank percentile
+
+    Args:
+        values (list[float]): sorted values, not empty
+        fraction (float): percentile between 0 and 1
+
+    Returns:
+        float: smallest value with at least fraction of the values below or
+        equal to it
+    """
+    rank = max(math.ceil(fraction * len(values)), 1)
+    return values[rank - 1]
+
+
+class FrameProfiler:
+    """Class that records the time of every phase of the last frames
+
+    Phase times go into fixed size arrays used as a ring buffer, one slot
+    per frame, so the profiler can stay on for a whole session without
+    growing. Game.step starts a new frame, and the game's phase context
+    managers record into it. A phase that runs several times in a frame
+    adds up its times.
+    """
+
+    def __init__(self, capacity=CAPACITY):
+        """Constructor
+
+        Args:
+            capacity (integer, optional): number of frames kept. Defaults to
+                CAPACITY.
+        """
+        self.capacity = capacity
+        # Frames started so far and slot of the current one
+        self.frames = 0
+        self.slot = -1
+        # Start time of each frame and time until the next one started
+        self.frame_starts = array("d", [NAN] * capacity)
+        self.frame_times = array("d", [NAN] * capacity)
+        # Start times and durations of each phase by slot, NaN when the
+        # phase did not run in that frame
+        self.starts = {}
+        self.durations = {}
+        self.font = None
+        self.overlay = None
+        self.overlay_frame = 0
+
+    def begin_frame(self):
+        """Starts recording a new frame, overwriting the oldest one"""
+        now = time.perf_counter()
+        if self.slot >= 0:
+            self.frame_times[self.slot] = now - self.frame_starts[self.slot]
+        self.slot = self.frames % self.capacity
+        self.frames += 1
+        self.frame_starts[self.slot] = now
+        self.frame_times[self.slot] = NAN
+        for durations in self.durations.values():
+            durations[self.slot] = NAN
+
+    @contextmanager
+    def phase(self, name):
+        """Times the code run inside the context
+
+        Args:
+            name (string): phase name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            slot = self.slot
+            # Phases run before the first frame are not recorded
+            if slot >= 0:
+                durations = self.durations.get(name)
+                if durations is None:
+                    durations = array("d", [NAN] * self.capacity)
+                    self.durations[name] = durations
+                    self.starts[name] = array("d", [NAN] * self.capacity)
+                if math.isnan(durations[slot]):
+                    self.starts[name][slot] = start
+                    durations[slot] = elapsed
+                else:
+                    durations[slot] += elapsed
+
+    def slots(self):
+        """Slots of the recorded frames, from the oldest to the newest
+
+        Returns:
+            list[integer]: slot numbers
+        """
+        if self.frames <= self.capacity:
+            return list(range(self.frames))
+        first = self.slot + 1
+        return [(first + i) % self.capacity for i in range(self.capacity)]
+
+    def samples(self, name):
+        """Times of a phase in the recorded frames
+
+        Args:
+            name (string): phase name, or "frame" for whole frames
+
+        Returns:
+            list[float]: times in ms, None for frames without the phase
+        """
+        times = self.frame_times if name == "frame" else self.durations[name]
+        return [
+            None if math.isnan(times[slot]) else times[slot] * 1000
+            for slot in self.slots()
+        ]
+
+    def summary(self):
+        """Summarises the recorded frames
+
+        Returns:
+            dict: p50, p99, mean and worst time in ms of whole frames and of
+            each phase, over the frames each of them ran in
+        """
+        summary = {}
+        for name in ["frame", *self.durations]:
+            times = sorted(t for t in self.samples(name) if t is not None)
+            if not times:
+                continue
+            summary[name] = {
+                "frames": len(times),
+                "p50_ms": round(percentile(times, 0.5), 4),
+                "p99_ms": round(percentile(times, 0.99), 4),
+                "mean_ms": round(math.fsum(times) / len(times), 4),
+                "max_ms": round(times[-1], 4),
+            }
+        return summary
+
+    def trace_events(self):
+        """Converts the recorded frames to Chrome trace events
+
+        Returns:
+            list[dict]: complete events, in microseconds since the oldest
+            recorded frame, phases nested inside their frame
+        """
+        slots = self.slots()
+        if not slots:
+            return []
+        origin = self.frame_starts[slots[0]]
+
+        def event(name, start, duration):
+            return {
+                "name": name,
+                "ph": "X",
+                "ts": round((start - origin) * 1e6, 3),
+                "dur": round(duration * 1e6, 3),
+                "pid": 1,
+                "tid": 1,
+            }
+
+        events = []
+        for slot in slots:
+            if not math.isnan(self.frame_times[slot]):
+                start = self.frame_starts[slot]
+                events.append(event("frame", start, self.frame_times[slot]))
+            for name, durations in self.durations.items():
+                if not math.isnan(durations[slot]):
+                    events.append(
+                        event(name, self.starts[name][slot], durations[slot])
+                    )
+        return events
+
+    def export(self, path, trace_format="json"):
+        """Writes the recorded frames to a file
+
+        Args:
+            path (string): output file path
+            trace_format (string, optional): "json" for the summary and the
+                time of every phase in every frame, "chrome" for a trace
+                that chrome://tracing or Perfetto can open. Defaults to
+                "json".
+        """
+        if trace_format == "chrome":
+            data = {
+                "traceEvents": self.trace_events(),
+                "displayTimeUnit": "ms",
+            }
+        elif trace_format == "json":
+            data = {
+                "capacity": self.capacity,
+                "frames": len(self.slots()),
+                "summary": self.summary(),
+                "samples_ms": {
+                    name: self.samples(name)
+                    for name in ["frame", *self.durations]
+                },
+            }
+        else:
+            raise ValueError(f"Unknown trace format {trace_format}")
+        with open(path, "w") as file:
+            json.dump(data, file)
+
+    def render_overlay(self):
+        """Renders the p50 and p99 of every phase into a surface
+
+        Returns:
+            Surface: overlay with a translucent background
+        """
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        rows = [("phase", "p50", "p99")]
+        for name, stats in self.summary().items():
+            rows.append(
+                (name, f"{stats['p50_ms']:.2f}", f"{stats['p99_ms']:.2f}")
+            )
+        cells = [
+            [self.font.render(text, True, OVERLAY_COLOUR) for text in row]
+            for row in rows
+        ]
+        widths = [
+            max(row[column].get_width() for row in cells) + 8
+            for column in range(3)
+        ]
+        line_height = self.font.get_linesize()
+        overlay = pygame.Surface(
+            (sum(widths) + 8, line_height * len(rows) + 8), pygame.SRCALPHA
+        )
+        overlay.fill(OVERLAY_BG)
+        for index, row in enumerate(cells):
+            y = 4 + index * line_height
+            # Names aligned to the left, times to the right of their column
+            overlay.blit(row[0], (4, y))
+            x = 4 + widths[0]
+            for column in (1, 2):
+                x += widths[column]
+                overlay.blit(row[column], (x - row[column].get_width(), y))
+        return overlay
+
+    def draw_overlay(self, surface):
+        """Draws the phase statistics in the top right corner
+
+        Args:
+            surface (Surface): surface to draw on
+
+        Returns:
+            Rect: region of the surface drawn on
+        """
+        if self.overlay is None or (
+            self.frames - self.overlay_frame >= OVERLAY_REFRESH
+        ):
+            self.overlay = self.render_overlay()
+            self.overlay_frame = self.frames
+        rect = self.overlay.get_rect(topright=(surface.get_width(), 0))
+        surface.blit(self.overlay, rect)
+        return rect
@@ -0,0 +1,210 @@
+import struct
+
+# File header: magic, format version, starting level, flags, the seed of the
+# game, the seeds derived from it (see shooter.seed_random_sources) and the
+# number of recorded frames
+MAGIC = b"ESRP"
+# Raised whenever the same seeds and input play out differently, as older
+# replays would no longer play back the same way
+VERSION = 3
+HEADER = struct.Struct("<4sHBBQ4II")
+# Header flags, the game options that change how the game plays
+PRELOAD = 1
+BATCH_ENEMIES = 2
+
+# Input bits of a frame, in the order of the Inputs fields: a, d, w, space
+# and q keys
+BUTTONS = ("moving_left", "moving_right", "jump", "shoot", "grenade")
+# Extra bit: the level was restarted before this frame
+RESTART = 1 << len(BUTTONS)
+
+
+def encode(inputs, restart=False):
+    """Packs the input of a frame into a bitmask
+
+    Args:
+        inputs (Inputs): player input for the frame
+        restart (boolean, optional): the level was restarted before the
+            frame. Defaults to False.
+
+    Returns:
+        integer: input bitmask
+    """
+    mask = RESTART if restart else 0
+    for bit, button in enumerate(BUTTONS):
+        if getattr(inputs, button):
+            mask |= 1 << bit
+    return mask
+
+
+def decode(mask):
+    """Unpacks the buttons of an input bitmask
+
+    Args:
+        mask (integer): input bitmask
+
+    Returns:
+        tuple: one boolean per button, in the order of the Inputs fields
+    """
+    return tuple(bool(mask & 1 << bit) for bit in range(len(BUTTONS)))
+
+
+def write_varint(out, value):
+    """Appends an unsigned integer using 7 bits per byte
+
+    Args:
+        out (bytearray): buffer to append to
+        value (integer): non-negative integer
+    """
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    """Reads an unsigned integer written by write_varint
+
+    Args:
+        data (bytes): buffer to read from
+        offset (integer): position of the first byte
+
+    Returns:
+        tuple: value and position of the next byte
+    """
+    value = shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated replay")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Recording:
+    """Class that represents the seeds and player input of a game session
+
+    Given the same seed, options and input, a game plays exactly the same
+    way, so this is all it takes to replay a session. The input is stored as
+    runs of frames with the same bitmask: a key held down for a second costs
+    two bytes instead of sixty.
+    """
+
+    def __init__(self, level, seed, seeds, preload=False, batch_enemies=False):
+        """Constructor
+
+        Args:
+            level (integer): level the game started on
+            seed (integer): seed the game was created with
+            seeds (tuple): seeds derived from it, to detect replays of a
+                game that draws its random numbers differently
+            preload (boolean, optional): the game preloaded its levels.
+                Defaults to False.
+            batch_enemies (boolean, optional): the game ran the enemy AI in
+                batch. Defaults to False.
+        """
+        self.level = level
+        self.seed = seed
+        self.seeds = tuple(seeds)
+        self.preload = preload
+        self.batch_enemies = batch_enemies
+        # [bitmask, number of frames] pairs
+        self.runs = []
+
+    def add(self, inputs, restart=False):
+        """Records the input of the next frame
+
+        Args:
+            inputs (Inputs): player input for the frame
+            restart (boolean, optional): the level was restarted before the
+                frame. Defaults to False.
+        """
+        mask = encode(inputs, restart)
+        if self.runs and self.runs[-1][0] == mask:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([mask, 1])
+
+    def masks(self):
+        """Iterates through the recorded frames
+
+        Returns:
+            iterator[integer]: input bitmask of every frame
+        """
+        for mask, count in self.runs:
+            for _ in range(count):
+                yield mask
+
+    def __len__(self):
+        """Number of recorded frames"""
+        return sum(count for _, count in self.runs)
+
+
+def save(recording, path):
+    """Writes a recording to a replay file
+
+    Args:
+        recording (Recording): recording to write
+        path (string): replay file path
+    """
+    flags = 0
+    if recording.preload:
+        flags |= PRELOAD
+    if recording.batch_enemies:
+        flags |= BATCH_ENEMIES
+    data = bytearray(
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            recording.level,
+            flags,
+            recording.seed,
+            *recording.seeds,
+            len(recording),
+        )
+    )
+    for mask, count in recording.runs:
+        data.append(mask)
+        write_varint(data, count)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def load(path):
+    """Reads a replay file
+
+    Args:
+        path (string): replay file path
+
+    Returns:
+        Recording: recorded session
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a replay")
+    magic, version, level, flags, seed, *seeds, frames = HEADER.unpack_from(
+        data
+    )
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a replay")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported replay version {version}")
+    recording = Recording(
+        level,
+        seed,
+        seeds,
+        preload=bool(flags & PRELOAD),
+        batch_enemies=bool(flags & BATCH_ENEMIES),
+    )
+    offset = HEADER.size
+    while offset < len(data):
+        mask = data[offset]
+        count, offset = read_varint(data, offset + 1)
+        recording.runs.append([mask, count])
+    if len(recording) != frames:
+        raise ValueError(f"{path} is truncated")
+    return recording
@@ -1,33 +1,65 @@
+# First, so the launch time is taken before the other imports
+import launch
+import argparse
 import pygame
 from pygame import mixer
-import os
 import random
-import csv
+import time
+import weakref
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 import button
+import assets
+import parallax
+import levels
+import pooling
+import dirty
+import enemies
+import replay
+import profiler
 
 # Simulation model modules
-from linear_congruential import LinearCongruential
-from middle_square import MiddleSquare
-from multiplicative_congruential import MultiplicativeCongruential
+import generators
 
-mixer.init()
-pygame.init()
+# Simulation model instances, by generator name (see generator_benchmark.py)
+linearCongruential = generators.create("linear")
+middleSquare = generators.create("middle_square")
+multiplicativeCongruential = generators.create("multiplicative")
+
+
+def seed_random_sources(seed):
+    """Seeds the simulation models and the random module from one seed
+
+    Args:
+        seed (integer): seed the seeds of every random source derive from
+
+    Returns:
+        tuple: seeds given to the linear congruential, middle square and
+        multiplicative congruential generators and to random
+    """
+    global linearCongruential, middleSquare, multiplicativeCongruential
+    source = random.Random(seed)
+    seeds = tuple(source.getrandbits(32) for _ in range(4))
+    linearCongruential = generators.create("linear", seeds[0])
+    middleSquare = generators.create("middle_square", seeds[1])
+    multiplicativeCongruential = generators.create("multiplicative", seeds[2])
+    random.seed(seeds[3])
+    return seeds
 
-# Simulation model instances
-linearCongruential = LinearCongruential()
-middleSquare = MiddleSquare()
-multiplicativeCongruential = MultiplicativeCongruential()
 
 # Game window variables
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = int(SCREEN_WIDTH * 0.8)
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Elite Soldier")
+# Game window, opened by init_display
+screen = None
 
 # Set framerate
 clock = pygame.time.Clock()
 FPS = 60
+# Simulated milliseconds that pass on every game step
+FRAME_TIME = 1000 / FPS
 
 # Define game variables
 GRAVITY = 0.75
@@ -36,65 +68,100 @@ ROWS = 16
 COLS = 150
 TILE_SIZE = SCREEN_HEIGHT // ROWS
 TILE_TYPES = 21
+CHUNK_COLUMNS = 10
+# Colour of the transparent pixels of chunks, not used by any tile
+CHUNK_KEY = (255, 0, 255)
 MAX_LEVELS = 3
-screen_scroll = 0
-bg_scroll = 0
-level = 1
-start_game = False
-start_intro = False
-
-
-# Define player action variables
-moving_left = False
-moving_right = False
-shoot = False
-grenade = False
-grenade_thrown = False
-
-
-# Load music and sounds
-pygame.mixer.music.load("audio/music2.mp3")
-pygame.mixer.music.set_volume(0.3)
-pygame.mixer.music.play(-1, 0.0, 5000)
-jump_fx = pygame.mixer.Sound("audio/jump.wav")
-jump_fx.set_volume(0.05)
-shot_fx = pygame.mixer.Sound("audio/shot.wav")
-shot_fx.set_volume(0.05)
-grenade_fx = pygame.mixer.Sound("audio/grenade.wav")
-grenade_fx.set_volume(0.05)
-
-
-# Load images
-# Button images
-start_img = pygame.image.load("img/start_btn.png").convert_alpha()
-exit_img = pygame.image.load("img/exit_btn.png").convert_alpha()
-restart_img = pygame.image.load("img/restart_btn.png").convert_alpha()
-# Background
-pine1_img = pygame.image.load("img/Background/pine3.png").convert_alpha()
-pine2_img = pygame.image.load("img/Background/river.png").convert_alpha()
-pine3_img = pygame.image.load("img/Background/pine2.png").convert_alpha()
-mountain_img = pygame.image.load("img/Background/mountain.png").convert_alpha()
-sky_img = pygame.image.load("img/Background/sky_cloud.png").convert_alpha()
-# Store tiles in a list
+PLAYER_SCALE = 2.2
+ENEMY_SCALE = 1.65
+EXPLOSION_SCALE = 0.5
+
+
+# Sounds, loaded by load_audio
+jump_fx = None
+shot_fx = None
+grenade_fx = None
+
+# Images, loaded by load_sprites
+sprites = None
+start_img = None
+exit_img = None
+restart_img = None
 img_list = []
-for x in range(TILE_TYPES):
-    img = pygame.image.load(f"img/Tile/{x}.png")
-    img = pygame.transform.scale(img, (TILE_SIZE, TILE_SIZE))
-    img_list.append(img)
-# Bullet
-bullet_img = pygame.image.load("img/icons/bullet.png").convert_alpha()
-# Grenade
-grenade_img = pygame.image.load("img/icons/grenade.png").convert_alpha()
-# Pick up boxes
-health_box_img = pygame.image.load("img/icons/health_box.png").convert_alpha()
-ammo_box_img = pygame.image.load("img/icons/ammo_box.png").convert_alpha()
-grenade_box_img = pygame.image.load(
-    "img/icons/grenade_box.png").convert_alpha()
-item_boxes = {
-    "Health": health_box_img,
-    "Ammo": ammo_box_img,
-    "Grenade": grenade_box_img,
-}
+bullet_img = None
+grenade_img = None
+item_boxes = {}
+
+# Menu buttons, created by load_sprites
+start_button = None
+exit_button = None
+restart_button = None
+
+
+def init_display():
+    """Opens the game window"""
+    global screen
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Elite Soldier")
+
+
+def load_sprites():
+    """Loads the tiles, icons and frames and creates the menu buttons"""
+    global sprites, start_img, exit_img, restart_img, img_list
+    global bullet_img, grenade_img, item_boxes
+    global start_button, exit_button, restart_button
+    # Tiles, icons, buttons and soldier and explosion frames, pre-scaled for
+    # the screen size and packed in one atlas
+    sprites = assets.load_atlas(
+        TILE_SIZE,
+        TILE_TYPES,
+        {"player": PLAYER_SCALE, "enemy": ENEMY_SCALE},
+        EXPLOSION_SCALE,
+    )
+    # Button images
+    start_img = sprites.image("start_btn")
+    exit_img = sprites.image("exit_btn")
+    restart_img = sprites.image("restart_btn")
+    # Store tiles in a list
+    img_list = [sprites.image(f"tile/{x}") for x in range(TILE_TYPES)]
+    # Bullet
+    bullet_img = sprites.image("icons/bullet")
+    # Grenade
+    grenade_img = sprites.image("icons/grenade")
+    # Pick up boxes
+    item_boxes = {
+        "Health": sprites.image("icons/health_box"),
+        "Ammo": sprites.image("icons/ammo_box"),
+        "Grenade": sprites.image("icons/grenade_box"),
+    }
+
+    # Create buttons
+    start_button = button.Button(
+        SCREEN_WIDTH // 2 - 130, SCREEN_HEIGHT // 2 - 150, start_img, 1
+    )
+    exit_button = button.Button(
+        SCREEN_WIDTH // 2 - 110, SCREEN_HEIGHT // 2 + 50, exit_img, 1
+    )
+    restart_button = button.Button(
+        SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 50, restart_img, 2
+    )
+
+
+def load_audio():
+    """Opens the audio device, starts the music and loads the sounds"""
+    global jump_fx, shot_fx, grenade_fx
+    mixer.init()
+    # Load music and sounds
+    pygame.mixer.music.load("audio/music2.mp3")
+    pygame.mixer.music.set_volume(0.3)
+    pygame.mixer.music.play(-1, 0.0, 5000)
+    jump_fx = pygame.mixer.Sound("audio/jump.wav")
+    jump_fx.set_volume(0.05)
+    shot_fx = pygame.mixer.Sound("audio/shot.wav")
+    shot_fx.set_volume(0.05)
+    grenade_fx = pygame.mixer.Sound("audio/grenade.wav")
+    grenade_fx.set_volume(0.05)
 
 
 # Define colours
@@ -105,83 +172,103 @@ GREEN = (0, 255, 0)
 BLACK = (0, 0, 0)
 PINK = (235, 65, 54)
 
-# Define font
-font = pygame.font.SysFont("Futura", 30)
-
-
-def draw_text(text, font, text_col, x, y):
+# Font and background, loaded by load_fonts and load_background
+font = None
+background = None
+
+
+def load_fonts():
+    """Loads the HUD font"""
+    global font
+    pygame.font.init()
+    font = pygame.font.SysFont("Futura", 30)
+
+
+def load_background():
+    """Loads the background images and composites the parallax strips"""
+    global background
+    pine2_img = pygame.image.load("img/background/river.png").convert_alpha()
+    pine3_img = pygame.image.load("img/background/pine2.png").convert_alpha()
+    mountain_img = pygame.image.load(
+        "img/background/mountain.png"
+    ).convert_alpha()
+    sky_img = pygame.image.load("img/background/sky_cloud.png").convert_alpha()
+
+    # Background layers composited into strips that repeat every sky width
+    background = parallax.ParallaxBackground(SCREEN_WIDTH, SCREEN_HEIGHT)
+    bg_width = sky_img.get_width()
+    background.add_layer(
+        0.5, bg_width, [(sky_img, (0, 0))], offset=-100, fill=BG
+    )
+    background.add_layer(
+        0.7,
+        bg_width,
+        [
+            (
+                mountain_img,
+                (0, SCREEN_HEIGHT - mountain_img.get_height() - 270),
+            ),
+            (
+                mountain_img,
+                (0, SCREEN_HEIGHT - mountain_img.get_height() - 185),
+            ),
+            (pine3_img, (0, SCREEN_HEIGHT - pine3_img.get_height() - 300)),
+            (pine2_img, (0, SCREEN_HEIGHT - 300)),
+        ],
+    )
+    background.add_layer(
+        0.9,
+        bg_width,
+        [(pine3_img, (0, SCREEN_HEIGHT - pine3_img.get_height() - 200))],
+    )
+    background.build()
+
+
+def draw_text(surface, text, font, text_col, x, y):
     """Draw text on screen
 
     Args:
+        surface (Surface): surface to draw on
         text (string): text to draw
         font (Font): font type
         text_col (tuple): text colour
         x (integer): x coordinate
         y (integer): y coordinate
     """
-    img = font.render(text, True, text_col)
-    screen.blit(img, (x, y))
-
-
-def draw_bg():
-    """Draw game background"""
-    screen.fill(BG)
-    width = sky_img.get_width()
-    for x in range(5):
-        screen.blit(sky_img, ((x * width - 100) - bg_scroll * 0.5, 0))
-        screen.blit(
-            mountain_img,
-            (
-                (x * width) - bg_scroll * 0.7,
-                SCREEN_HEIGHT - mountain_img.get_height() - 270,
-            ),
-        )
-        screen.blit(
-            mountain_img,
-            (
-                (x * width) - bg_scroll * 0.7,
-                SCREEN_HEIGHT - mountain_img.get_height() - 185,
-            ),
-        )
+    surface.blit(render_text(text, font, text_col), (x, y))
+
+
+# Rendered text surfaces, keyed by (text, font, colour)
+text_cache = {}
 
-        screen.blit(
-            pine3_img,
-            (
-                (x * width) - bg_scroll * 0.7,
-                SCREEN_HEIGHT - pine3_img.get_height() - 300,
-            ),
-        )
-        screen.blit(
-            pine2_img,
-            ((x * width) - bg_scroll * 0.7, SCREEN_HEIGHT - 300),
-        )
-        screen.blit(
-            pine3_img,
-            (
-                (x * width) - bg_scroll * 0.9,
-                SCREEN_HEIGHT - pine3_img.get_height() - 200,
-            ),
-        )
 
+def render_text(text, font, text_col):
+    """Renders a text once and returns the same surface afterwards
+
+    Args:
+        text (string): text to render
+        font (Font): font type
+        text_col (tuple): text colour
+
+    Returns:
+        Surface: rendered text
+    """
+    key = (text, font, text_col)
+    img = text_cache.get(key)
+    if img is None:
+        img = font.render(text, True, text_col)
+        text_cache[key] = img
+    return img
 
-# Function to reset level
-def reset_level():
-    enemy_group.empty()
-    bullet_group.empty()
-    grenade_group.empty()
-    explosion_group.empty()
-    item_box_group.empty()
-    decoration_group.empty()
-    water_group.empty()
-    exit_group.empty()
 
-    # Create empty tile list
-    data = []
-    for row in range(ROWS):
-        r = [-1] * COLS
-        data.append(r)
+def draw_bg(surface, camera):
+    """Draw game background
 
-    return data
+    Args:
+        surface (Surface): surface to draw on
+        camera (Camera): camera the background scrolls with
+    """
+    background.draw(surface, camera.x)
 
 
 class Soldier(pygame.sprite.Sprite):
@@ -194,10 +281,11 @@ class Soldier(pygame.sprite.Sprite):
         Soldier: soldier instance
     """
 
-    def __init__(self, char_type, x, y, scale, speed, ammo, grenades):
+    def __init__(self, world, char_type, x, y, scale, speed, ammo, grenades):
         """Constructor
 
         Args:
+            world (World): world the soldier belongs to
             char_type (string): soldier type (player or enemy)
             x (float): x rectangle coordinate
             y (float): y rectangle coordinate
@@ -207,6 +295,7 @@ class Soldier(pygame.sprite.Sprite):
             grenades (integer): grenades amount
         """
         pygame.sprite.Sprite.__init__(self)
+        self.world = world
         self.alive = True
         self.char_type = char_type
         self.speed = speed
@@ -225,7 +314,7 @@ class Soldier(pygame.sprite.Sprite):
         self.animation_list = []
         self.frame_index = 0
         self.action = 0
-        self.update_time = pygame.time.get_ticks()
+        self.update_time = self.world.time
         # AI specific variables
         self.move_counter = 0
         self.vision = pygame.Rect(
@@ -234,26 +323,15 @@ class Soldier(pygame.sprite.Sprite):
         self.idling = False
         self.idling_counter = 0
 
-        # Load all images for the players
-        animation_types = ["Idle", "Run", "Jump", "Shoot", "Death"]
-        for animation in animation_types:
-            # Reset temporary list of images
-            temp_list = []
-            # Count number of files in the folder
-            num_of_frames = len(os.listdir(
-                f"img/{self.char_type}/{animation}"))
-            for i in range(num_of_frames):
-                img = pygame.image.load(
-                    f"img/{self.char_type}/{animation}/{i}.png"
-                ).convert_alpha()
-                img = pygame.transform.scale(
-                    img, (int(img.get_width() * scale),
-                          int(img.get_height() * scale))
-                )
-                temp_list.append(img)
-            self.animation_list.append(temp_list)
+        # Get all images for the soldier (shared with the other soldiers)
+        for animation in assets.ANIMATIONS:
+            self.animation_list.append(
+                assets.load_animation(self.char_type, animation, scale)
+            )
 
-        self.image = self.animation_list[self.action][self.frame_index]
+        # Right and left facing versions of the current frame
+        self.image_variants = self.animation_list[self.action][self.frame_index]
+        self.image = self.image_variants[0]
         # Rectangle to control positions and collisions
         self.rect = self.image.get_rect()
         # Set rectangle based on x and y coordinates
@@ -277,10 +355,8 @@ class Soldier(pygame.sprite.Sprite):
             moving_right (boolean): right direction flag
 
         Returns:
-            (integer, boolean): screen_scroll, level_complete
+            boolean: level_complete
         """
-        # Reset movement variables
-        screen_scroll = 0
         # Variables to predict position based on dx and dy
         dx = 0
         dy = 0
@@ -307,10 +383,11 @@ class Soldier(pygame.sprite.Sprite):
             self.vel_y
         dy += self.vel_y
 
-        # Check for collision
-        for tile in world.obstacle_list:
+        # Check for collision with the tiles around the predicted position
+        area = self.rect.union(self.rect.move(dx, dy))
+        for tile in self.world.get_obstacles(area):
             # Check collision in the x direction
-            if tile[1].colliderect(
+            if tile.colliderect(
                 self.rect.x + dx, self.rect.y, self.width, self.height
             ):
                 dx = 0
@@ -319,26 +396,26 @@ class Soldier(pygame.sprite.Sprite):
                     self.direction *= -1
                     self.move_counter = 0
             # Check for collision in the y direction
-            if tile[1].colliderect(
+            if tile.colliderect(
                 self.rect.x, self.rect.y + dy, self.width, self.height
             ):
                 # Check if below the ground, i.e. jumping
                 if self.vel_y < 0:
                     self.vel_y = 0
-                    dy = tile[1].bottom - self.rect.top
+                    dy = tile.bottom - self.rect.top
                 # Check if above the ground, i.e. falling
                 elif self.vel_y >= 0:
                     self.vel_y = 0
                     self.in_air = False
-                    dy = tile[1].top - self.rect.bottom
+                    dy = tile.top - self.rect.bottom
 
         # Check for collision with water
-        if pygame.sprite.spritecollide(self, water_group, False):
+        if pygame.sprite.spritecollide(self, self.world.water_group, False):
             self.health = 0
 
         # Check for collision with exit
         level_complete = False
-        if pygame.sprite.spritecollide(self, exit_group, False):
+        if pygame.sprite.spritecollide(self, self.world.exit_group, False):
             level_complete = True
 
         # Check if fallen off the map
@@ -346,42 +423,45 @@ class Soldier(pygame.sprite.Sprite):
             self.health = 0
 
         # Check if going off the edges of the screen
+        camera = self.world.camera
         if self.char_type == "player":
-            if self.rect.left + dx < 0 or self.rect.right + dx > SCREEN_WIDTH:
+            if (
+                self.rect.left + dx < camera.x
+                or self.rect.right + dx > camera.x + SCREEN_WIDTH
+            ):
                 dx = 0
 
-        # Update rectangle position
+        # Update rectangle position, truncating like the pygame the levels
+        # were made with did: newer versions round instead, which takes 8
+        # pixels off the top of a jump and leaves ledges out of reach
         self.rect.x += dx
-        self.rect.y += dy
+        self.rect.y = int(self.rect.y + dy)
 
         # Update scroll based on player position
         if self.char_type == "player":
-            if (
-                self.rect.right > SCREEN_WIDTH - SCROLL_THRESH
-                and bg_scroll < (world.level_length * TILE_SIZE) - SCREEN_WIDTH
-            ) or (self.rect.left < SCROLL_THRESH and bg_scroll > abs(dx)):
-                self.rect.x -= dx
-                screen_scroll = -dx
+            camera.follow(self.rect, dx)
 
-        return screen_scroll, level_complete
+        return level_complete
 
     def shoot(self):
         """Shoot method"""
         if self.shoot_cooldown == 0 and self.ammo > 0:
             self.shoot_cooldown = 20
             bullet = Bullet(
+                self.world,
                 self.rect.centerx +
                 (0.75 * self.rect.size[0] * self.direction),
                 self.rect.centery,
                 self.direction,
             )
-            bullet_group.add(bullet)
+            self.world.bullet_group.add(bullet)
             # Reduce ammo
             self.ammo -= 1
             shot_fx.play()
 
     def ai(self):
         """AI logic soldier"""
+        player = self.world.player
         if self.alive and player.alive:
             if self.idling == False and random.randint(1, 200) == 1:
                 self.update_action(0)  # 0: idle
@@ -418,18 +498,16 @@ class Soldier(pygame.sprite.Sprite):
                     if self.idling_counter <= 0:
                         self.idling = False
 
-        # Scroll
-        self.rect.x += screen_scroll
-
     def update_animation(self):
         """Update soldier animation"""
         # Animation timer | Animation speed
         ANIMATION_COOLDOWN = 100
         # Update image depending on current frame
-        self.image = self.animation_list[self.action][self.frame_index]
+        self.image_variants = self.animation_list[self.action][self.frame_index]
+        self.image = self.image_variants[0]
         # Check if enough time has passed since the last update
-        if pygame.time.get_ticks() - self.update_time > ANIMATION_COOLDOWN:
-            self.update_time = pygame.time.get_ticks()
+        if self.world.time - self.update_time > ANIMATION_COOLDOWN:
+            self.update_time = self.world.time
             self.frame_index += 1
         # If the animation has run out the reset back to the start
         if self.frame_index >= len(self.animation_list[self.action]):
@@ -448,7 +526,7 @@ class Soldier(pygame.sprite.Sprite):
             self.action = new_action
             # Update the animation settings
             self.frame_index = 0
-            self.update_time = pygame.time.get_ticks()
+            self.update_time = self.world.time
 
     def check_alive(self):
         """Check if soldier is alive depending on health variable"""
@@ -458,81 +536,341 @@ class Soldier(pygame.sprite.Sprite):
             self.alive = False
             self.update_action(4)
 
-    def draw(self):
-        """Draw soldier onto screen"""
-        screen.blit(pygame.transform.flip(
-            self.image, self.flip, False), self.rect)
+    def draw(self, surface):
+        """Draw soldier onto screen facing its current direction
+
+        Args:
+            surface (Surface): surface to draw on
+        """
+        camera = self.world.camera
+        if camera.is_visible(self.rect):
+            img = self.image_variants[self.flip]
+            surface.blit(img, camera.apply(self.rect))
+
+
+# Chunks rendered for each level, shared by every world of that level (the
+# one played, its preloaded copy for restarts...) as they are never drawn on
+chunk_cache = weakref.WeakKeyDictionary()
 
 
 class World:
-    """Class that represents a world"""
+    """Class that represents a world: the tiles and sprites of a level"""
 
     def __init__(self):
         """Constructor"""
+        # Simulated time in milliseconds since the level was loaded
+        self.time = 0
+        self.player = None
+        self.health_bar = None
+        self.camera = None
+        # Create sprite groups
+        self.enemy_group = pygame.sprite.Group()
+        self.bullet_group = pygame.sprite.Group()
+        self.grenade_group = pygame.sprite.Group()
+        self.explosion_group = pygame.sprite.Group()
+        self.item_box_group = pygame.sprite.Group()
+        self.decoration_group = pygame.sprite.Group()
+        self.water_group = pygame.sprite.Group()
+        self.exit_group = pygame.sprite.Group()
         self.obstacle_list = []
+        # Item boxes picked up by the player, by item type
+        self.pickups = Counter()
+        # Runs the enemy AI in batch when the game uses it (see Game)
+        self.enemy_manager = None
+        # Obstacle tile rectangles indexed by [row][column] for collisions
+        self.obstacle_grid = []
+        # Obstacle tiles prerendered into surfaces CHUNK_COLUMNS tiles wide
+        self.chunks = []
+        # Decorations, water and exits prerendered in front of the sprites
+        self.scenery_chunks = []
 
     def process_data(self, data):
         """
 
         Args:
-            data (list[][]): csv data
+            data (Level): level tiles
 
         Returns:
             (Soldier, HealthBar): player, health_bar
         """
-        self.level_length = len(data[0])
-        # Iterate through each value in level data file
-        for y, row in enumerate(data):
-            for x, tile in enumerate(row):
-                if tile >= 0:
-                    img = img_list[tile]
-                    img_rect = img.get_rect()
-                    img_rect.x = x * TILE_SIZE
-                    img_rect.y = y * TILE_SIZE
-                    tile_data = (img, img_rect)
-                    if tile >= 0 and tile <= 8:
-                        self.obstacle_list.append(tile_data)
-                    elif tile >= 9 and tile <= 10:
-                        water = Water(img, x * TILE_SIZE, y * TILE_SIZE)
-                        water_group.add(water)
-                    elif tile >= 11 and tile <= 14:
-                        decoration = Decoration(
-                            img, x * TILE_SIZE, y * TILE_SIZE)
-                        decoration_group.add(decoration)
-                    elif tile == 15:  # Create player
-                        player = Soldier(
-                            "player", x * TILE_SIZE, y * TILE_SIZE, 2.2, 5, 20, 5
-                        )
-                        health_bar = HealthBar(
-                            10, 10, player.health, player.health)
-                    elif tile == 16:  # Create enemies
-                        enemy = Soldier(
-                            "enemy", x * TILE_SIZE, y * TILE_SIZE, 1.65, 2, 20, 0
-                        )
-                        enemy_group.add(enemy)
-                    elif tile == 17:  # Create ammo box
-                        item_box = ItemBox(
-                            "Ammo", x * TILE_SIZE, y * TILE_SIZE)
-                        item_box_group.add(item_box)
-                    elif tile == 18:  # Create grenade box
-                        item_box = ItemBox(
-                            "Grenade", x * TILE_SIZE, y * TILE_SIZE)
-                        item_box_group.add(item_box)
-                    elif tile == 19:  # Create health box
-                        item_box = ItemBox(
-                            "Health", x * TILE_SIZE, y * TILE_SIZE)
-                        item_box_group.add(item_box)
-                    elif tile == 20:  # Create exit
-                        exit = Exit(img, x * TILE_SIZE, y * TILE_SIZE)
-                        exit_group.add(exit)
-
-        return player, health_bar
-
-    def draw(self):
-        """Draws obstacles tiles onto screen"""
-        for tile in self.obstacle_list:
-            tile[1][0] += screen_scroll
-            screen.blit(tile[0], tile[1])
+        self.level_length = data.cols
+        self.obstacle_grid = [
+            [None] * self.level_length for row in range(data.rows)
+        ]
+        # Iterate through each non-empty tile of the level
+        for x, y, tile in data.tiles():
+            img = img_list[tile]
+            img_rect = img.get_rect()
+            img_rect.x = x * TILE_SIZE
+            img_rect.y = y * TILE_SIZE
+            tile_data = (img, img_rect)
+            if tile >= 0 and tile <= 8:
+                self.obstacle_list.append(tile_data)
+                self.obstacle_grid[y][x] = img_rect
+            elif tile >= 9 and tile <= 10:
+                water = Water(img, x * TILE_SIZE, y * TILE_SIZE)
+                self.water_group.add(water)
+            elif tile >= 11 and tile <= 14:
+                decoration = Decoration(img, x * TILE_SIZE, y * TILE_SIZE)
+                self.decoration_group.add(decoration)
+            elif tile == 15:  # Create player
+                self.player = Soldier(
+                    self, "player", x * TILE_SIZE, y * TILE_SIZE,
+                    PLAYER_SCALE, 5, 20, 5
+                )
+                self.health_bar = HealthBar(
+                    10, 10, self.player.health, self.player.health
+                )
+            elif tile == 16:  # Create enemies
+                enemy = Soldier(
+                    self, "enemy", x * TILE_SIZE, y * TILE_SIZE,
+                    ENEMY_SCALE, 2, 20, 0
+                )
+                self.enemy_group.add(enemy)
+            elif tile == 17:  # Create ammo box
+                item_box = ItemBox(self, "Ammo", x * TILE_SIZE, y * TILE_SIZE)
+                self.item_box_group.add(item_box)
+            elif tile == 18:  # Create grenade box
+                item_box = ItemBox(
+                    self, "Grenade", x * TILE_SIZE, y * TILE_SIZE
+                )
+                self.item_box_group.add(item_box)
+            elif tile == 19:  # Create health box
+                item_box = ItemBox(
+                    self, "Health", x * TILE_SIZE, y * TILE_SIZE
+                )
+                self.item_box_group.add(item_box)
+            elif tile == 20:  # Create exit
+                exit = Exit(img, x * TILE_SIZE, y * TILE_SIZE)
+                self.exit_group.add(exit)
+        self.camera = Camera(self.level_length * TILE_SIZE)
+        cached = chunk_cache.get(data)
+        if cached is None:
+            chunks = self.render_chunks(self.obstacle_list)
+            # Static sprites are drawn from chunks instead of their groups
+            scenery = []
+            for group in (
+                self.decoration_group, self.water_group, self.exit_group
+            ):
+                scenery.extend(
+                    (sprite.image, sprite.rect) for sprite in group
+                )
+            cached = (chunks, self.render_chunks(scenery))
+            chunk_cache[data] = cached
+        self.chunks, self.scenery_chunks = cached
+
+        return self.player, self.health_bar
+
+    def render_chunks(self, tiles):
+        """Prerenders static tiles into chunk surfaces CHUNK_COLUMNS tiles wide
+
+        Each chunk only covers the tiles it holds: its consecutive rows of
+        tiles are cropped into one surface each, so empty sky costs neither
+        memory nor blitting.
+
+        Args:
+            tiles (list[tuple]): tiles (image, rectangle) in level coordinates
+
+        Returns:
+            list[list[tuple]]: (surface, (x, y)) pieces of every chunk in
+            level coordinates, an empty list for chunks without tiles
+        """
+        chunk_width = CHUNK_COLUMNS * TILE_SIZE
+        num_of_chunks = -(-self.level_length // CHUNK_COLUMNS)
+        # Tiles of every chunk, by row
+        rows = [{} for index in range(num_of_chunks)]
+        for img, img_rect in tiles:
+            index = img_rect.x // chunk_width
+            rows[index].setdefault(img_rect.y // TILE_SIZE, []).append(
+                (img, img_rect)
+            )
+        chunks = []
+        for chunk_rows in rows:
+            pieces = []
+            run = []
+            for row in sorted(chunk_rows):
+                # A gap between rows ends the current piece
+                if run and row != run[-1] + 1:
+                    pieces.append(self.render_piece(chunk_rows, run))
+                    run = []
+                run.append(row)
+            if run:
+                pieces.append(self.render_piece(chunk_rows, run))
+            chunks.append(pieces)
+        return chunks
+
+    def render_piece(self, chunk_rows, rows):
+        """Renders consecutive rows of tiles into one cropped surface
+
+        Args:
+            chunk_rows (dict): tiles (image, rectangle) of a chunk, by row
+            rows (list[integer]): consecutive rows to render
+
+        Returns:
+            tuple: (surface, (x, y)) with the position in level coordinates
+        """
+        tiles = [tile for row in rows for tile in chunk_rows[row]]
+        bounds = tiles[0][1].unionall([img_rect for img, img_rect in tiles])
+        # Tile pixels are either opaque or fully transparent, so a colour key
+        # keeps them exact, and RLE skips the transparent runs when blitting
+        piece = pygame.Surface(bounds.size).convert()
+        piece.fill(CHUNK_KEY)
+        for img, img_rect in tiles:
+            piece.blit(img, (img_rect.x - bounds.x, img_rect.y - bounds.y))
+        piece.set_colorkey(CHUNK_KEY, pygame.RLEACCEL)
+        return piece, bounds.topleft
+
+    def get_obstacles(self, rect):
+        """Returns the obstacle tiles in the grid cells overlapped by a rectangle
+
+        Args:
+            rect (Rect): area to check
+
+        Returns:
+            list[Rect]: obstacle tile rectangles in row order
+        """
+        rows = len(self.obstacle_grid)
+        # Convert the area into grid cells, one pixel wider on each side
+        first_col = max((rect.left - 1) // TILE_SIZE, 0)
+        last_col = min(rect.right // TILE_SIZE, self.level_length - 1)
+        first_row = max((rect.top - 1) // TILE_SIZE, 0)
+        last_row = min(rect.bottom // TILE_SIZE, rows - 1)
+        obstacles = []
+        for row in self.obstacle_grid[first_row : last_row + 1]:
+            for tile in row[first_col : last_col + 1]:
+                if tile is not None:
+                    obstacles.append(tile)
+        return obstacles
+
+    def resolve_bullet_collisions(self):
+        """Resolves every bullet against the level and the soldiers once
+
+        Living enemies are bucketed by the tile columns they overlap, so each
+        bullet only tests the soldiers around it. A bullet damages at most the
+        first soldier it hits and a bullet stopped by the level damages nobody.
+        """
+        enemy_columns = {}
+        for enemy in self.enemy_group:
+            if enemy.alive:
+                first_col = enemy.rect.left // TILE_SIZE
+                last_col = enemy.rect.right // TILE_SIZE
+                for col in range(first_col, last_col + 1):
+                    enemy_columns.setdefault(col, []).append(enemy)
+
+        player = self.player
+        for bullet in self.bullet_group.sprites():
+            # Check for collision with level
+            if bullet.rect.collidelist(self.get_obstacles(bullet.rect)) != -1:
+                bullet.kill()
+                continue
+            # Check collision with characters
+            if player.alive and bullet.rect.colliderect(player.rect):
+                player.health -= 5
+                bullet.kill()
+                continue
+            first_col = bullet.rect.left // TILE_SIZE
+            last_col = bullet.rect.right // TILE_SIZE
+            for col in range(first_col, last_col + 1):
+                for enemy in enemy_columns.get(col, ()):
+                    if bullet.rect.colliderect(enemy.rect):
+                        enemy.health -= 25
+                        bullet.kill()
+                        break
+                if not bullet.alive():
+                    break
+
+    def draw(self, surface):
+        """Draws the obstacle chunks that are visible onto screen
+
+        Args:
+            surface (Surface): surface to draw on
+        """
+        self.draw_chunks(surface, self.chunks)
+
+    def draw_scenery(self, surface):
+        """Draws the decoration, water and exit chunks that are visible
+
+        Args:
+            surface (Surface): surface to draw on
+        """
+        self.draw_chunks(surface, self.scenery_chunks)
+
+    def draw_chunks(self, surface, chunks):
+        """Draws the chunks that intersect the camera view onto screen
+
+        Args:
+            surface (Surface): surface to draw on
+            chunks (list[list[tuple]]): chunk pieces, see render_chunks
+        """
+        camera_x = self.camera.x
+        chunk_width = CHUNK_COLUMNS * TILE_SIZE
+        first_chunk = max(camera_x // chunk_width, 0)
+        last_chunk = min(
+            (camera_x + SCREEN_WIDTH - 1) // chunk_width, len(chunks) - 1
+        )
+        for index in range(first_chunk, last_chunk + 1):
+            for piece, (x, y) in chunks[index]:
+                surface.blit(piece, (x - camera_x, y))
+
+
+class Camera:
+    """Class that represents the view of the level shown on screen"""
+
+    def __init__(self, level_width):
+        """Constructor
+
+        Args:
+            level_width (integer): level width in pixels
+        """
+        self.level_width = level_width
+        # Level x coordinate shown at the left edge of the screen
+        self.x = 0
+
+    def follow(self, rect, dx):
+        """Scrolls along with the player when it gets close to the edges
+
+        Args:
+            rect (Rect): player rectangle, already moved by dx
+            dx (integer): player horizontal movement
+        """
+        if (
+            rect.right - self.x > SCREEN_WIDTH - SCROLL_THRESH
+            and self.x < self.level_width - SCREEN_WIDTH
+        ) or (rect.left - self.x < SCROLL_THRESH and self.x > abs(dx)):
+            self.x += dx
+
+    def is_visible(self, rect):
+        """Checks if a rectangle is inside the view
+
+        Args:
+            rect (Rect): rectangle in level coordinates
+
+        Returns:
+            boolean: True if any part of the rectangle is on screen
+        """
+        return rect.right > self.x and rect.left < self.x + SCREEN_WIDTH
+
+    def apply(self, rect):
+        """Converts a rectangle from level to screen coordinates
+
+        Args:
+            rect (Rect): rectangle in level coordinates
+
+        Returns:
+            Rect: rectangle in screen coordinates
+        """
+        return rect.move(-self.x, 0)
+
+    def draw_group(self, group, surface):
+        """Draws the sprites of a group that are inside the view onto screen
+
+        Args:
+            group (Group): sprites in level coordinates
+            surface (Surface): surface to draw on
+        """
+        for sprite in group:
+            if self.is_visible(sprite.rect):
+                surface.blit(sprite.image, self.apply(sprite.rect))
 
 
 class Decoration(pygame.sprite.Sprite):
@@ -558,9 +896,6 @@ class Decoration(pygame.sprite.Sprite):
             y + (TILE_SIZE - self.image.get_height()),
         )
 
-    def update(self):
-        self.rect.x += screen_scroll
-
 
 class Water(pygame.sprite.Sprite):
     """Class that represents water
@@ -585,9 +920,6 @@ class Water(pygame.sprite.Sprite):
             y + (TILE_SIZE - self.image.get_height()),
         )
 
-    def update(self):
-        self.rect.x += screen_scroll
-
 
 class Exit(pygame.sprite.Sprite):
     """Class that represents exit
@@ -612,9 +944,6 @@ class Exit(pygame.sprite.Sprite):
             y + (TILE_SIZE - self.image.get_height()),
         )
 
-    def update(self):
-        self.rect.x += screen_scroll
-
 
 class ItemBox(pygame.sprite.Sprite):
     """Class that represents an item box
@@ -623,15 +952,17 @@ class ItemBox(pygame.sprite.Sprite):
         pygame (sprite): Base class for visible game objects
     """
 
-    def __init__(self, item_type, x, y):
+    def __init__(self, world, item_type, x, y):
         """Constructor
 
         Args:
+            world (World): world the item box belongs to
             item_type (string): string representing item type
             x (float): x coordinate
             y (float): y coordinate
         """
         pygame.sprite.Sprite.__init__(self)
+        self.world = world
         self.item_type = item_type
         self.image = item_boxes[self.item_type]
         self.rect = self.image.get_rect()
@@ -642,8 +973,7 @@ class ItemBox(pygame.sprite.Sprite):
 
     def update(self):
         """It checks if player has picked up the box"""
-        # Scroll
-        self.rect.x += screen_scroll
+        player = self.world.player
         # Check if the player has picked up the box
         if pygame.sprite.collide_rect(self, player):
             # Check what kind of box it was
@@ -655,6 +985,7 @@ class ItemBox(pygame.sprite.Sprite):
                 player.ammo += linearCongruential.generate_number(5, 15)
             elif self.item_type == "Grenade":
                 player.grenades += linearCongruential.generate_number(1, 3)
+            self.world.pickups[self.item_type] += 1
             # Delete the item box
             self.kill()
 
@@ -676,19 +1007,87 @@ class HealthBar:
         self.health = health
         self.max_health = max_health
 
-    def draw(self, health):
+    def draw(self, surface, health):
         """Draws and updates player health bar
 
         Args:
+            surface (Surface): surface to draw on
             health (integer): player health
         """
         # Update with new health
         self.health = health
         # Calculate health ratio
         ratio = self.health / self.max_health
-        pygame.draw.rect(screen, BLACK, (self.x - 2, self.y - 2, 154, 24))
-        pygame.draw.rect(screen, RED, (self.x, self.y, 150, 20))
-        pygame.draw.rect(screen, GREEN, (self.x, self.y, 150 * ratio, 20))
+        pygame.draw.rect(surface, BLACK, (self.x - 2, self.y - 2, 154, 24))
+        pygame.draw.rect(surface, RED, (self.x, self.y, 150, 20))
+        pygame.draw.rect(surface, GREEN, (self.x, self.y, 150 * ratio, 20))
+
+
+class Hud:
+    """Class that represents the health, ammo and grenades display
+
+    The display is rendered into a cached surface, and only rendered again
+    when one of the values it shows changes.
+    """
+
+    def __init__(self):
+        """Constructor"""
+        self.image = None
+        # Region of the screen covered by the cached image
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        # Values shown by the cached image
+        self.state = None
+
+    def render(self, health_bar, player):
+        """Renders the display into a new cached image
+
+        Args:
+            health_bar (HealthBar): player health bar
+            player (Soldier): player the values are taken from
+        """
+        width = max(
+            SCREEN_WIDTH,
+            90 + player.ammo * 10 + bullet_img.get_width(),
+            135 + player.grenades * 15 + grenade_img.get_width(),
+        )
+        layer = pygame.Surface((width, 100), pygame.SRCALPHA)
+        # Show player health
+        health_bar.draw(layer, player.health)
+        # Show ammo
+        draw_text(layer, "AMMO: ", font, WHITE, 10, 35)
+        for x in range(player.ammo):
+            layer.blit(bullet_img, (90 + (x * 10), 40))
+        # Show grenades
+        draw_text(layer, "GRENADES: ", font, WHITE, 10, 60)
+        for x in range(player.grenades):
+            layer.blit(grenade_img, (135 + (x * 15), 60))
+        # Keep only the part with something drawn on it
+        self.rect = layer.get_bounding_rect()
+        self.image = layer.subsurface(self.rect).convert_alpha()
+
+    def draw(self, surface, health_bar, player):
+        """Draws the display, rendering it first if a value has changed
+
+        Args:
+            surface (Surface): surface to draw on
+            health_bar (HealthBar): player health bar
+            player (Soldier): player the values are taken from
+
+        Returns:
+            Rect: region of the screen that changed since the last draw,
+            None if the display looks the same
+        """
+        changed = None
+        state = (
+            player.health, health_bar.max_health, player.ammo, player.grenades
+        )
+        if state != self.state:
+            old_rect = self.rect
+            self.render(health_bar, player)
+            self.state = state
+            changed = self.rect.union(old_rect)
+        surface.blit(self.image, self.rect)
+        return changed
 
 
 class Bullet(pygame.sprite.Sprite):
@@ -698,15 +1097,17 @@ class Bullet(pygame.sprite.Sprite):
         pygame (Sprite): Base class for visible game objects
     """
 
-    def __init__(self, x, y, direction):
+    def __init__(self, world, x, y, direction):
         """Constructor
 
         Args:
+            world (World): world the bullet belongs to
             x (float): x center rectangle coordinate
             y (float): y center rectangle coordinate
             direction (integer): bullet direction
         """
         pygame.sprite.Sprite.__init__(self)
+        self.world = world
         self.speed = 10
         self.image = bullet_img
         self.rect = self.image.get_rect()
@@ -714,26 +1115,11 @@ class Bullet(pygame.sprite.Sprite):
         self.direction = direction
 
     def update(self):
-        """Move bullet"""
-        self.rect.x += (self.direction * self.speed) + screen_scroll
+        """Move bullet, collisions are checked by the world afterwards"""
+        self.rect.x += self.direction * self.speed
         # Check if bullet has gone off screen
-        if self.rect.right < 0 or self.rect.left > SCREEN_WIDTH:
+        if not self.world.camera.is_visible(self.rect):
             self.kill()
-        # Check for collision with level
-        for tile in world.obstacle_list:
-            if tile[1].colliderect(self.rect):
-                self.kill()
-
-        # Check collision with characters
-        if pygame.sprite.spritecollide(player, bullet_group, False):
-            if player.alive:
-                player.health -= 5
-                self.kill()
-        for enemy in enemy_group:
-            if pygame.sprite.spritecollide(enemy, bullet_group, False):
-                if enemy.alive:
-                    enemy.health -= 25
-                    self.kill()
 
 
 class Grenade(pygame.sprite.Sprite):
@@ -743,15 +1129,30 @@ class Grenade(pygame.sprite.Sprite):
         pygame (Sprite): Base class for visible game objects
     """
 
-    def __init__(self, x, y, direction):
+    def __init__(self, world, x, y, direction):
         """Constructor
 
         Args:
+            world (World): world the grenade belongs to
             x (float): x coordinate
             y (float): y coordinate
             direction (integer): grenade direction
         """
         pygame.sprite.Sprite.__init__(self)
+        # Pool the grenade is returned to when it explodes
+        self.pool = None
+        self.reset(world, x, y, direction)
+
+    def reset(self, world, x, y, direction):
+        """Puts the grenade back in its just thrown state
+
+        Args:
+            world (World): world the grenade belongs to
+            x (float): x coordinate
+            y (float): y coordinate
+            direction (integer): grenade direction
+        """
+        self.world = world
         self.timer = 100
         self.vel_y = -11
         self.speed = 7
@@ -762,6 +1163,14 @@ class Grenade(pygame.sprite.Sprite):
         self.height = self.image.get_height()
         self.direction = direction
 
+    def clear(self):
+        """Drops the world while the grenade waits in its pool
+
+        A free grenade would otherwise keep the world it exploded in alive
+        after a restart or a level change.
+        """
+        self.world = None
+
     def update(self):
         """It updates grenade mechanics, collisions and explosions"""
         self.vel_y += GRAVITY
@@ -769,50 +1178,57 @@ class Grenade(pygame.sprite.Sprite):
         dy = self.vel_y
 
         # Check for collision with level
-        for tile in world.obstacle_list:
+        area = self.rect.union(self.rect.move(dx, dy))
+        for tile in self.world.get_obstacles(area):
             # Check collision with walls
-            if tile[1].colliderect(
+            if tile.colliderect(
                 self.rect.x + dx, self.rect.y, self.width, self.height
             ):
                 self.direction *= -1
                 dx = self.direction * self.speed
             # Check for collision in the y direction
-            if tile[1].colliderect(
+            if tile.colliderect(
                 self.rect.x, self.rect.y + dy, self.width, self.height
             ):
                 self.speed = 0
                 # Check if below the ground, i.e. thrown up
                 if self.vel_y < 0:
                     self.vel_y = 0
-                    dy = tile[1].bottom - self.rect.top
+                    dy = tile.bottom - self.rect.top
                 # Check if above the ground, i.e. falling
                 elif self.vel_y >= 0:
                     self.vel_y = 0
-                    dy = tile[1].top - self.rect.bottom
+                    dy = tile.top - self.rect.bottom
 
         # Update grenade position
-        self.rect.x += dx + screen_scroll
+        self.rect.x += dx
         self.rect.y += dy
 
         # Countdown timer
         self.timer -= 1
         if self.timer <= 0:
-            self.kill()
             grenade_fx.play()
-            explosion = Explosion(self.rect.x, self.rect.y, 0.5)
-            explosion_group.add(explosion)
+            explosion_pool.acquire(
+                self.world.explosion_group,
+                self.rect.x,
+                self.rect.y,
+                EXPLOSION_SCALE,
+            )
             # Do damage to anyone that is nearby
+            player = self.world.player
             if (
                 abs(self.rect.centerx - player.rect.centerx) < TILE_SIZE * 2
                 and abs(self.rect.centery - player.rect.centery) < TILE_SIZE * 2
             ):
                 player.health -= 50
-            for enemy in enemy_group:
+            for enemy in self.world.enemy_group:
                 if (
                     abs(self.rect.centerx - enemy.rect.centerx) < TILE_SIZE * 2
                     and abs(self.rect.centery - enemy.rect.centery) < TILE_SIZE * 2
                 ):
                     enemy.health -= 50
+            # Back to the pool last, as that drops the world
+            pooling.release(self)
 
 
 class Explosion(pygame.sprite.Sprite):
@@ -831,15 +1247,19 @@ class Explosion(pygame.sprite.Sprite):
             scale (float): image scales
         """
         pygame.sprite.Sprite.__init__(self)
-        self.images = []
-        for num in range(1, 6):
-            img = pygame.image.load(
-                f"img/explosion/exp{num}.png").convert_alpha()
-            img = pygame.transform.scale(
-                img, (int(img.get_width() * scale),
-                      int(img.get_height() * scale))
-            )
-            self.images.append(img)
+        # Pool the explosion is returned to when its animation ends
+        self.pool = None
+        self.reset(x, y, scale)
+
+    def reset(self, x, y, scale):
+        """Puts the explosion back at the start of its animation
+
+        Args:
+            x (float): x coordinate
+            y (float): y coordinate
+            scale (float): image scales
+        """
+        self.images = assets.load_explosion(scale)
         self.frame_index = 0
         self.image = self.images[self.frame_index]
         self.rect = self.image.get_rect()
@@ -848,9 +1268,6 @@ class Explosion(pygame.sprite.Sprite):
 
     def update(self):
         """It updates explosion animation"""
-        # Scroll
-        self.rect.x += screen_scroll
-
         EXPLOSION_SPEED = 4
         # Update explosion animation
         self.counter += 1
@@ -860,11 +1277,22 @@ class Explosion(pygame.sprite.Sprite):
             self.frame_index += 1
             # If the animation is complete then delete the explosion
             if self.frame_index >= len(self.images):
-                self.kill()
+                pooling.release(self)
             else:
                 self.image = self.images[self.frame_index]
 
 
+# Grenades and explosions are recycled, heavy combat creates lots of them
+grenade_pool = pooling.SpritePool(Grenade, 32)
+explosion_pool = pooling.SpritePool(Explosion, 32)
+
+
+def fill_pools():
+    """Creates some grenades and explosions ahead of the first fight"""
+    grenade_pool.prefill(8, None, 0, 0, 1)
+    explosion_pool.prefill(8, 0, 0, EXPLOSION_SCALE)
+
+
 class ScreenFade:
     def __init__(self, direction, colour, speed):
         self.direction = direction
@@ -872,28 +1300,28 @@ class ScreenFade:
         self.speed = speed
         self.fade_counter = 0
 
-    def fade(self):
+    def fade(self, surface):
         fade_complete = False
         self.fade_counter += self.speed
         if self.direction == 1:  # Whole screen fade
             pygame.draw.rect(
-                screen,
+                surface,
                 self.colour,
                 (0 - self.fade_counter, 0, SCREEN_WIDTH // 2, SCREEN_HEIGHT),
             )
             pygame.draw.rect(
-                screen,
+                surface,
                 self.colour,
                 (SCREEN_WIDTH // 2 + self.fade_counter,
                  0, SCREEN_WIDTH, SCREEN_HEIGHT),
             )
             pygame.draw.rect(
-                screen,
+                surface,
                 self.colour,
                 (0, 0 - self.fade_counter, SCREEN_WIDTH, SCREEN_HEIGHT // 2),
             )
             pygame.draw.rect(
-                screen,
+                surface,
                 self.colour,
                 (
                     0,
@@ -904,7 +1332,7 @@ class ScreenFade:
             )
         if self.direction == 2:  # Vertical screen fade down
             pygame.draw.rect(
-                screen, self.colour, (0, 0, SCREEN_WIDTH,
+                surface, self.colour, (0, 0, SCREEN_WIDTH,
                                       0 + self.fade_counter)
             )
         if self.fade_counter >= SCREEN_WIDTH:
@@ -918,198 +1346,630 @@ intro_fade = ScreenFade(1, BLACK, 4)
 death_fade = ScreenFade(2, PINK, 4)
 
 
-# Create buttons
-start_button = button.Button(
-    SCREEN_WIDTH // 2 - 130, SCREEN_HEIGHT // 2 - 150, start_img, 1
-)
-exit_button = button.Button(
-    SCREEN_WIDTH // 2 - 110, SCREEN_HEIGHT // 2 + 50, exit_img, 1
+class Startup:
+    """Class that runs the startup stages in order and times each of them
+
+    Importing the game loads nothing. The menu only needs the first stages,
+    the rest are loaded one per menu frame, or all at once by whatever needs
+    them first (creating a Game does).
+    """
+
+    def __init__(self, stages, started=None):
+        """Constructor
+
+        Args:
+            stages (list[tuple]): (name, function) of each stage, in order
+            started (float, optional): perf_counter time the program started
+                at. Defaults to now.
+        """
+        self.pending = list(stages)
+        self.started = time.perf_counter() if started is None else started
+        # Time each stage took, in ms
+        self.timings = {}
+        # Time from the start to the first frame the player can act on. From
+        # launch.STARTED it covers importing pygame and the game modules, the
+        # startup stages and the first menu frame, not starting Python itself
+        self.interactive = None
+
+    @property
+    def done(self):
+        """True once every stage has run"""
+        return not self.pending
+
+    @contextmanager
+    def stage(self, name):
+        """Times the code run inside the context as a startup stage
+
+        Args:
+            name (string): stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (time.perf_counter() - start) * 1000
+
+    def run_next(self):
+        """Runs the next pending stage"""
+        name, function = self.pending.pop(0)
+        with self.stage(name):
+            function()
+
+    def run_until(self, name):
+        """Runs the pending stages up to and including one
+
+        Args:
+            name (string): last stage to run
+        """
+        while name not in self.timings and self.pending:
+            self.run_next()
+
+    def finish(self):
+        """Runs every pending stage"""
+        while self.pending:
+            self.run_next()
+
+    def mark_interactive(self):
+        """Records the time to interactive, the first time it is called"""
+        if self.interactive is None:
+            self.interactive = (time.perf_counter() - self.started) * 1000
+
+    def report(self):
+        """Summarises the startup
+
+        Returns:
+            dict: time of each stage and time to interactive, in ms
+        """
+        interactive = self.interactive
+        return {
+            "stages_ms": {
+                name: round(ms, 3) for name, ms in self.timings.items()
+            },
+            "time_to_interactive_ms": (
+                None if interactive is None else round(interactive, 3)
+            ),
+        }
+
+
+# Window and menu first, then what the game needs once it starts
+startup = Startup(
+    [
+        ("display", init_display),
+        ("sprites", load_sprites),
+        ("audio", load_audio),
+        ("background", load_background),
+        ("fonts", load_fonts),
+        ("pools", fill_pools),
+    ],
+    launch.STARTED,
 )
-restart_button = button.Button(
-    SCREEN_WIDTH // 2 - 100, SCREEN_HEIGHT // 2 - 50, restart_img, 2
+
+
+def build_world(data):
+    """Creates a world ready to be played from level data
+
+    Args:
+        data (Level): level tiles
+
+    Returns:
+        World: new world
+    """
+    world = World()
+    world.process_data(data)
+    return world
+
+
+# Context used for the frame phases when the game is not being profiled
+NO_PROFILING = nullcontext()
+
+# Player input for one game step
+Inputs = namedtuple(
+    "Inputs",
+    ["moving_left", "moving_right", "jump", "shoot", "grenade"],
+    defaults=[False] * 5,
 )
 
-# Create sprite groups
-enemy_group = pygame.sprite.Group()
-bullet_group = pygame.sprite.Group()
-grenade_group = pygame.sprite.Group()
-explosion_group = pygame.sprite.Group()
-item_box_group = pygame.sprite.Group()
-decoration_group = pygame.sprite.Group()
-water_group = pygame.sprite.Group()
-exit_group = pygame.sprite.Group()
-
-
-# Create empty tile list
-world_data = []
-for row in range(ROWS):
-    r = [-1] * COLS
-    world_data.append(r)
-# Load in level data and create world
-with open(f"level{level}_data.csv", newline="") as csvfile:
-    reader = csv.reader(csvfile, delimiter=",")
-    for x, row in enumerate(reader):
-        for y, tile in enumerate(row):
-            world_data[x][y] = int(tile)
-world = World()
-player, health_bar = world.process_data(world_data)
-
-
-run = True
-while run:
-    clock.tick(FPS)
-
-    if start_game == False:
-        # Draw menu
-        screen.fill(BG)
-        # Add buttons
-        if start_button.draw(screen):
-            start_game = True
-            start_intro = True
-        if exit_button.draw(screen):
-            run = False
-    else:
-        # Update background
-        draw_bg()
-        # Draw world map
-        world.draw()
-        # Show player health
-        health_bar.draw(player.health)
-        # Show ammo
-        draw_text("AMMO: ", font, WHITE, 10, 35)
-        for x in range(player.ammo):
-            screen.blit(bullet_img, (90 + (x * 10), 40))
-        # Show grenades
-        draw_text("GRENADES: ", font, WHITE, 10, 60)
-        for x in range(player.grenades):
-            screen.blit(grenade_img, (135 + (x * 15), 60))
-
-        player.update()
-        player.draw()
-
-        for enemy in enemy_group:
-            enemy.ai()
-            enemy.update()
-            enemy.draw()
-
-        # Update and draw groups
-        bullet_group.update()
-        grenade_group.update()
-        explosion_group.update()
-        item_box_group.update()
-        decoration_group.update()
-        water_group.update()
-        exit_group.update()
-        bullet_group.draw(screen)
-        grenade_group.draw(screen)
-        explosion_group.draw(screen)
-        item_box_group.draw(screen)
-        decoration_group.draw(screen)
-        water_group.draw(screen)
-        exit_group.draw(screen)
-
-        # Show intro
-        if start_intro == True:
-            if intro_fade.fade():
-                start_intro = False
-                intro_fade.fade_counter = 0
+
+class Game:
+    """Class that represents the game state, advanced one fixed step at a time
+
+    The game does not depend on the display, the event queue or real time,
+    so it can also run headless (see headless.py) as fast as the CPU allows.
+    """
+
+    def __init__(self, level=1, preload=False, batch_enemies=False, seed=None):
+        """Constructor
+
+        Args:
+            level (integer, optional): level to start on. Defaults to 1.
+            preload (boolean, optional): build the next level and a fresh copy
+                of the current one in a worker thread. Defaults to False.
+            batch_enemies (boolean, optional): run the enemy AI for all the
+                enemies at once with an EnemyManager (requires NumPy).
+                Defaults to False.
+            seed (integer, optional): seed every random source of the game
+                for a reproducible run. Defaults to None (seeded from time).
+        """
+        # Everything the game draws or plays has to be loaded by now
+        startup.finish()
+        self.seed = seed
+        # Seeds of the random sources, None when seeded from time
+        self.seeds = None
+        if seed is not None:
+            self.seeds = seed_random_sources(seed)
+        self.batch_enemies = batch_enemies
+        self.frame = 0
+        # Set once the player has gone through the exit of the last level
+        self.completed = False
+        self.grenade_thrown = False
+        # Object with begin_frame() and a phase(name) context manager timing
+        # parts of a frame
+        self.profiler = None
+        self.hud = Hud()
+        # Region of the screen the HUD changed in the last draw, if any
+        self.hud_changed = None
+        # Worlds being built in the background, keyed by level number
+        self.preloaded = {}
+        self.executor = None
+        if preload:
+            # One worker, so worlds are always built one at a time
+            self.executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="preload"
+            )
+        self.load_level(level)
+
+    def load_level(self, level):
+        """Loads a level and creates its world
+
+        Args:
+            level (integer): level number
+        """
+        self.level = level
+        future = self.preloaded.pop(level, None)
+        if future is not None:
+            # Normally long finished: the swap itself costs nothing
+            self.world = future.result()
+        else:
+            self.load_world(levels.load(level))
+        self.preload()
+
+    def load_world(self, data):
+        """Creates the world from level data
+
+        Args:
+            data (Level): level tiles
+        """
+        self.world = build_world(data)
+
+    def preload(self):
+        """Starts building the worlds the game may switch to next
+
+        A pristine copy of the current level is kept ready for restarts, and
+        the next level for when the player reaches the exit.
+        """
+        if self.executor is None:
+            return
+        # Worlds of levels the game has moved past are no longer needed
+        for level in list(self.preloaded):
+            if level not in (self.level, self.level + 1):
+                self.preloaded.pop(level).cancel()
+        for level in (self.level, self.level + 1):
+            if level <= MAX_LEVELS and level not in self.preloaded:
+                self.preloaded[level] = self.executor.submit(
+                    build_world, levels.load(level)
+                )
+
+    def close(self):
+        """Stops the preloading worker, dropping the worlds not used yet"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        self.preloaded.clear()
+
+    def phase(self, name):
+        """Returns the context manager that times a phase of the frame
+
+        Args:
+            name (string): phase name
+
+        Returns:
+            context manager: profiler phase, or a no-op when not profiling
+        """
+        if self.profiler is None:
+            return NO_PROFILING
+        return self.profiler.phase(name)
+
+    def restart_level(self):
+        """Loads the current level again from the beginning"""
+        self.load_level(self.level)
+
+    def step(self, inputs):
+        """Advances the game by one frame
+
+        Args:
+            inputs (Inputs): player input for this frame
+
+        Returns:
+            boolean: True if the player has completed a level in this frame
+        """
+        if self.completed:
+            return False
+        self.frame += 1
+        if self.profiler is not None:
+            self.profiler.begin_frame()
+        world = self.world
+        world.time += FRAME_TIME
+        player = world.player
+
+        # Apply key presses and releases
+        if inputs.jump and player.alive:
+            player.jump = True
+            jump_fx.play()
+        if not inputs.shoot:
+            player.shooting = False
+        if not inputs.grenade:
+            self.grenade_thrown = False
+
+        with self.phase("player_update"):
+            player.update()
+        with self.phase("enemy_ai"):
+            if self.batch_enemies:
+                if world.enemy_manager is None:
+                    world.enemy_manager = enemies.EnemyManager(
+                        world, TILE_SIZE, GRAVITY, SCREEN_HEIGHT
+                    )
+                world.enemy_manager.update()
+            else:
+                for enemy in world.enemy_group:
+                    enemy.ai()
+        with self.phase("enemy_update"):
+            for enemy in world.enemy_group:
+                enemy.update()
+
+        # Update groups
+        with self.phase("bullet_update"):
+            world.bullet_group.update()
+        with self.phase("grenade_update"):
+            world.grenade_group.update()
+        with self.phase("explosion_update"):
+            world.explosion_group.update()
+        with self.phase("item_box_update"):
+            world.item_box_group.update()
+        with self.phase("collisions"):
+            world.resolve_bullet_collisions()
 
         # Update player actions
+        with self.phase("player_actions"):
+            level_complete = self.update_player(inputs)
+
+        return level_complete
+
+    def update_player(self, inputs):
+        """Shoots, throws grenades, animates and moves the player
+
+        Args:
+            inputs (Inputs): player input for this frame
+
+        Returns:
+            boolean: True if the player has completed a level in this frame
+        """
+        world = self.world
+        player = world.player
+        level_complete = False
         if player.alive:
             # Shoot bullets
-            if shoot:
+            if inputs.shoot:
                 player.shooting = True
                 player.shoot()
             # Throw grenades
-            elif grenade and grenade_thrown == False and player.grenades > 0:
-                grenade = Grenade(
+            elif (
+                inputs.grenade
+                and self.grenade_thrown == False
+                and player.grenades > 0
+            ):
+                grenade_pool.acquire(
+                    world.grenade_group,
+                    world,
                     player.rect.centerx
                     + (0.5 * player.rect.size[0] * player.direction),
                     player.rect.top,
                     player.direction,
                 )
-                grenade_group.add(grenade)
                 # Reduce grenades
                 player.grenades -= 1
-                grenade_thrown = True
+                self.grenade_thrown = True
             if player.in_air:
                 player.update_action(2)  # 2: Jump
             elif player.shooting:
                 player.update_action(3)  # 3: Shoot
-            elif moving_left or moving_right:
+            elif inputs.moving_left or inputs.moving_right:
                 player.update_action(1)  # 1: Run
             else:
                 player.update_action(0)  # 0: Idle
-            screen_scroll, level_complete = player.move(
-                moving_left, moving_right)
-            bg_scroll -= screen_scroll
+            level_complete = player.move(
+                inputs.moving_left, inputs.moving_right)
             # Check if player has completed the level
             if level_complete:
+                if self.level < MAX_LEVELS:
+                    self.load_level(self.level + 1)
+                else:
+                    self.completed = True
+
+        return level_complete
+
+    def draw(self, surface):
+        """Draws the current frame of the game
+
+        Args:
+            surface (Surface): surface to draw on
+        """
+        world = self.world
+        player = world.player
+        # Update background
+        with self.phase("draw_bg"):
+            draw_bg(surface, world.camera)
+        # Draw world map
+        with self.phase("world_draw"):
+            world.draw(surface)
+        with self.phase("hud_draw"):
+            self.hud_changed = self.hud.draw(surface, world.health_bar, player)
+
+        with self.phase("player_draw"):
+            player.draw(surface)
+        with self.phase("enemy_draw"):
+            for enemy in world.enemy_group:
+                enemy.draw(surface)
+
+        # Draw groups
+        camera = world.camera
+        with self.phase("bullet_draw"):
+            camera.draw_group(world.bullet_group, surface)
+        with self.phase("grenade_draw"):
+            camera.draw_group(world.grenade_group, surface)
+        with self.phase("explosion_draw"):
+            camera.draw_group(world.explosion_group, surface)
+        with self.phase("item_box_draw"):
+            camera.draw_group(world.item_box_group, surface)
+        with self.phase("scenery_draw"):
+            world.draw_scenery(surface)
+
+    def mark_dirty(self, tracker):
+        """Adds the regions of the screen changed by the last draw
+
+        Args:
+            tracker (DirtyTracker): tracker of the changed screen regions
+        """
+        world = self.world
+        camera = world.camera
+        # Scrolling or switching worlds changes the whole screen
+        tracker.changed((world, camera.x))
+        if self.hud_changed is not None:
+            tracker.add(self.hud_changed)
+        for group in (
+            (world.player,),
+            world.enemy_group,
+            world.bullet_group,
+            world.grenade_group,
+            world.explosion_group,
+            world.item_box_group,
+        ):
+            for sprite in group:
+                if camera.is_visible(sprite.rect):
+                    rect = pygame.Rect(
+                        sprite.rect.topleft, sprite.image.get_size()
+                    )
+                    tracker.add(camera.apply(rect))
+
+
+def new_game(record=None):
+    """Creates the game played in the window, loading what is still missing
+
+    Args:
+        record (string, optional): replay file the session is recorded to.
+            Defaults to None.
+
+    Returns:
+        tuple: game and its Recording, None when not recording
+    """
+    startup.finish()
+    with startup.stage("game"):
+        if record is None:
+            return Game(preload=True), None
+        # A recorded game needs a known seed to be played back
+        seed = random.SystemRandom().getrandbits(64)
+        game = Game(preload=True, seed=seed)
+        recording = replay.Recording(
+            game.level, seed, game.seeds, preload=True
+        )
+        return game, recording
+
+
+def main(dirty_rects=False, record=None, frame_profiler=None):
+    """Runs the game in the window until the player quits
+
+    Args:
+        dirty_rects (boolean, optional): update only the parts of the display
+            that changed. Defaults to False.
+        record (string, optional): replay file to record the session to,
+            see headless.py to play it back. Defaults to None.
+        frame_profiler (FrameProfiler, optional): profiler recording the
+            phases of every frame, its overlay is toggled with F3. Defaults
+            to None.
+    """
+    # The menu only needs the window and the buttons, the rest of the game
+    # loads while it is shown
+    startup.run_until("sprites")
+    game = None
+    recording = None
+    restarted = False
+    show_profile = frame_profiler is not None
+    display = dirty.DirtyTracker(dirty_rects)
+    start_game = False
+    start_intro = False
+
+    # Define player action variables
+    moving_left = False
+    moving_right = False
+    shoot = False
+    grenade = False
+    jump = False
+
+    run = True
+    while run:
+        clock.tick(FPS)
+
+        if start_game == False:
+            # The menu does not change after its first frame
+            display.changed("menu")
+            # Draw menu
+            screen.fill(BG)
+            # Add buttons
+            if start_button.draw(screen):
+                start_game = True
                 start_intro = True
-                level += 1
-                bg_scroll = 0
-                world_data = reset_level()
-                if level <= MAX_LEVELS:
-                    # Load in level data and create world
-                    with open(f"level{level}_data.csv", newline="") as csvfile:
-                        reader = csv.reader(csvfile, delimiter=",")
-                        for x, row in enumerate(reader):
-                            for y, tile in enumerate(row):
-                                world_data[x][y] = int(tile)
-                    world = World()
-                    player, health_bar = world.process_data(world_data)
+                if game is None:
+                    game, recording = new_game(record)
+                    game.profiler = frame_profiler
+                assets.begin_gameplay()
+            if exit_button.draw(screen):
+                run = False
         else:
-            screen_scroll = 0
-            if death_fade.fade():
-                if restart_button.draw(screen):
-                    death_fade.fade_counter = 0
-                    start_intro = True
-                    bg_scroll = 0
-                    world_data = reset_level()
-                    # Load in level data and create world
-                    with open(f"level{level}_data.csv", newline="") as csvfile:
-                        reader = csv.reader(csvfile, delimiter=",")
-                        for x, row in enumerate(reader):
-                            for y, tile in enumerate(row):
-                                world_data[x][y] = int(tile)
-                    world = World()
-                    player, health_bar = world.process_data(world_data)
-
-    # Event handler
-    for event in pygame.event.get():
-        # Quit game
-        if event.type == pygame.QUIT:
-            run = False
-        # Keyboard presses
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_a:
-                moving_left = True
-            if event.key == pygame.K_d:
-                moving_right = True
-            if event.key == pygame.K_SPACE:
-                shoot = True
-            if event.key == pygame.K_q:
-                grenade = True
-            if event.key == pygame.K_w and player.alive:
-                player.jump = True
-                jump_fx.play()
-            if event.key == pygame.K_ESCAPE:
+            inputs = Inputs(moving_left, moving_right, jump, shoot, grenade)
+            if recording is not None:
+                recording.add(inputs, restarted)
+                restarted = False
+            if game.step(inputs):
+                start_intro = True
+            jump = False
+            game.draw(screen)
+            game.mark_dirty(display)
+
+            # Show intro
+            if start_intro == True:
+                display.invalidate()
+                if intro_fade.fade(screen):
+                    start_intro = False
+                    intro_fade.fade_counter = 0
+
+            # Show death screen
+            if not game.world.player.alive:
+                if not death_fade.fade(screen):
+                    display.invalidate()
+                else:
+                    display.add(restart_button.rect)
+                    if restart_button.draw(screen):
+                        death_fade.fade_counter = 0
+                        start_intro = True
+                        game.restart_level()
+                        restarted = True
+
+            if show_profile:
+                with game.phase("profile_overlay"):
+                    display.add(frame_profiler.draw_overlay(screen))
+
+        # Event handler
+        for event in pygame.event.get():
+            # Quit game
+            if event.type == pygame.QUIT:
                 run = False
-
-        # Keyboard button released
-        if event.type == pygame.KEYUP:
-            if event.key == pygame.K_a:
-                moving_left = False
-            if event.key == pygame.K_d:
-                moving_right = False
-            if event.key == pygame.K_SPACE:
-                shoot = False
-                player.shooting = False
-            if event.key == pygame.K_q:
-                grenade = False
-                grenade_thrown = False
-
-    # Update game window
-    pygame.display.update()
-
-pygame.quit()
+            # Keyboard presses
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_a:
+                    moving_left = True
+                if event.key == pygame.K_d:
+                    moving_right = True
+                if event.key == pygame.K_SPACE:
+                    shoot = True
+                if event.key == pygame.K_q:
+                    grenade = True
+                if event.key == pygame.K_w:
+                    jump = True
+                if event.key == pygame.K_ESCAPE:
+                    run = False
+                if event.key == pygame.K_F3 and frame_profiler is not None:
+                    show_profile = not show_profile
+                    display.invalidate()
+
+            # Keyboard button released
+            if event.type == pygame.KEYUP:
+                if event.key == pygame.K_a:
+                    moving_left = False
+                if event.key == pygame.K_d:
+                    moving_right = False
+                if event.key == pygame.K_SPACE:
+                    shoot = False
+                if event.key == pygame.K_q:
+                    grenade = False
+
+        # Update game window
+        if game is None:
+            display.present()
+            startup.mark_interactive()
+        else:
+            with game.phase("display_update"):
+                display.present()
+
+        # Load one more part of the game on every menu frame
+        if not start_game:
+            if not startup.done:
+                startup.run_next()
+            elif game is None:
+                game, recording = new_game(record)
+                game.profiler = frame_profiler
+
+    if game is not None:
+        game.close()
+    if recording is not None:
+        replay.save(recording, record)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Elite Soldier")
+    parser.add_argument(
+        "--dirty-rects",
+        action="store_true",
+        help="update only the parts of the window that changed",
+    )
+    parser.add_argument(
+        "--record", metavar="FILE", help="record the session to a replay file"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time the phases of every frame and show them (F3 toggles)",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="FILE",
+        help="write the frame phase times to a file on exit (implies "
+        "--profile)",
+    )
+    parser.add_argument(
+        "--profile-format",
+        choices=["json", "chrome"],
+        default="json",
+        help="format of the profile output (default: json)",
+    )
+    parser.add_argument(
+        "--startup-times",
+        action="store_true",
+        help="print how long each startup stage took on exit",
+    )
+    args = parser.parse_args()
+    frame_profiler = None
+    if args.profile or args.profile_output:
+        frame_profiler = profiler.FrameProfiler()
+    main(args.dirty_rects, args.record, frame_profiler)
+    if args.profile_output:
+        frame_profiler.export(args.profile_output, args.profile_format)
+    # Images are all read while starting, reading one mid-game is a stutter
+    gameplay_loads = assets.stats["gameplay_disk_loads"]
+    if args.startup_times:
+        for name, ms in startup.timings.items():
+            print(f"{name}: {ms:.1f} ms")
+        print(f"time to interactive: {startup.interactive:.1f} ms")
+        startup_loads = assets.stats["disk_loads"] - gameplay_loads
+        print(f"images read from disk: {startup_loads}")
+    if args.startup_times or gameplay_loads:
+        print(f"images read from disk while playing: {gameplay_loads}")
@@ -0,0 +1,16 @@
+import assets
+import headless
+from shooter import Game
+
+
+def test_playing_reads_no_images_from_disk(monkeypatch):
+    monkeypatch.setattr(assets, "in_gameplay", False)
+    monkeypatch.setitem(assets.stats, "gameplay_disk_loads", 0)
+    game = Game(1, seed=0)
+    assets.begin_gameplay()
+    # Running, jumping, shooting and throwing grenades, so soldiers die and
+    # grenades explode
+    headless.run(game, 600)
+    game.restart_level()
+    headless.run(game, 300)
+    assert assets.stats["gameplay_disk_loads"] == 0
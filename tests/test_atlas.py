@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+import atlas
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = {}
+    for name in ("a", "b"):
+        path = tmp_path / f"{name}.png"
+        path.write_bytes(name.encode() * 100)
+        paths[name] = str(path)
+    return paths
+
+
+def test_cached_source_hash_matches_source_hash(sources, tmp_path):
+    stamp = str(tmp_path / "cache" / "sprites.stamp")
+    expected = atlas.source_hash(sources, [40])
+    assert atlas.cached_source_hash(sources, [40], stamp) == expected
+
+
+def test_unchanged_sources_are_not_read(sources, tmp_path, monkeypatch):
+    stamp = str(tmp_path / "sprites.stamp")
+    checksum = atlas.cached_source_hash(sources, [40], stamp)
+
+    def fail(sources, params):
+        raise AssertionError("sources read again")
+
+    monkeypatch.setattr(atlas, "source_hash", fail)
+    assert atlas.cached_source_hash(sources, [40], stamp) == checksum
+
+
+def test_changed_sources_are_hashed_again(sources, tmp_path):
+    stamp = str(tmp_path / "sprites.stamp")
+    checksum = atlas.cached_source_hash(sources, [40], stamp)
+    with open(sources["a"], "ab") as file:
+        file.write(b"more")
+    changed = atlas.cached_source_hash(sources, [40], stamp)
+    assert changed != checksum
+    assert changed == atlas.source_hash(sources, [40])
+    # A touched but identical file only costs a hash, the result is the same
+    stat = os.stat(sources["b"])
+    os.utime(sources["b"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert atlas.cached_source_hash(sources, [40], stamp) == changed
+    # So do new build parameters
+    assert atlas.cached_source_hash(sources, [41], stamp) == (
+        atlas.source_hash(sources, [41])
+    )
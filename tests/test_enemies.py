@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+import pytest
+
+import enemies
+from shooter import Game, Inputs
+
+
+class NoIdleRolls:
+    """Stands in for the manager's generator, no enemy ever starts idling"""
+
+    def integers(self, low, high, size):
+        return np.full(size, high - 1)
+
+
+def enemy_states(game, frames):
+    states = []
+    for _ in range(frames):
+        game.step(Inputs())
+        states.append(
+            [
+                (tuple(enemy.rect), enemy.action, enemy.direction)
+                for enemy in game.world.enemy_group
+            ]
+        )
+    return states
+
+
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_batch_ai_matches_soldier_ai(level, monkeypatch):
+    # The idle rolls are the only difference between the two, stub them out
+    monkeypatch.setattr(random, "randint", lambda low, high: high)
+    monkeypatch.setattr(
+        enemies.np.random, "default_rng", lambda seed: NoIdleRolls()
+    )
+    single = Game(level, seed=5)
+    batch = Game(level, batch_enemies=True, seed=5)
+    assert enemy_states(batch, 600) == enemy_states(single, 600)
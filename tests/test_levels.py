@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+import levels
+
+ROWS = [
+    [-1, -1, 3],
+    [15, -1, -1],
+    [0, 1, 2],
+]
+
+
+def write_csv(path, rows):
+    path.write_text("\n".join(",".join(map(str, row)) for row in rows))
+
+
+@pytest.fixture
+def level(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(levels, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(levels, "loaded", {})
+    write_csv(tmp_path / "level9_data.csv", ROWS)
+    return tmp_path
+
+
+def compiled_path(directory):
+    return directory / "cache" / "level9.lvl"
+
+
+def test_load_compiles_the_csv(level):
+    data = levels.load(9)
+    assert (data.rows, data.cols, len(data)) == (3, 3, 5)
+    assert list(data.tiles()) == [
+        (2, 0, 3),
+        (0, 1, 15),
+        (0, 2, 0),
+        (1, 2, 1),
+        (2, 2, 2),
+    ]
+    assert compiled_path(level).exists()
+
+
+def test_load_reuses_the_mapped_level(level):
+    assert levels.load(9) is levels.load(9)
+
+
+def test_changed_csv_is_compiled_again(level):
+    levels.load(9)
+    write_csv(level / "level9_data.csv", [[4, 4, 4], [-1, -1, -1]])
+    data = levels.load(9)
+    assert (data.rows, len(data)) == (2, 3)
+    # A new process only has the checksum in the compiled file to go by
+    levels.loaded.clear()
+    write_csv(level / "level9_data.csv", ROWS)
+    source = "level9_data.csv"
+    assert levels.open_compiled(source, str(compiled_path(level))) is None
+    assert len(levels.load(9)) == 5
+
+
+def test_truncated_file_is_rejected(level):
+    levels.load(9)
+    levels.loaded.clear()
+    target = compiled_path(level)
+    data = target.read_bytes()
+    target.write_bytes(data[:-1])
+    assert levels.open_compiled("level9_data.csv", str(target)) is None
+    target.write_bytes(data[: levels.HEADER.size - 1])
+    assert levels.open_compiled("level9_data.csv", str(target)) is None
+    # Loading compiles it again
+    assert len(levels.load(9)) == 5
+    assert os.path.getsize(target) == len(data)
+
+
+def test_other_version_is_rejected(level):
+    levels.load(9)
+    target = compiled_path(level)
+    data = bytearray(target.read_bytes())
+    data[4:6] = (levels.VERSION + 1).to_bytes(2, "little")
+    target.write_bytes(data)
+    assert levels.open_compiled("level9_data.csv", str(target)) is None
@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+
+from linear_congruential import LinearCongruential
+
+
+def stream_states(stream, count):
+    states = []
+    for _ in range(count):
+        stream.generate_number(0, 1)
+        states.append(stream.seed)
+    return states
+
+
+@pytest.mark.parametrize("n", [2, 4, 8])
+def test_split_streams_have_different_low_bits(n):
+    streams = LinearCongruential(42).split(n)
+    low_bits = [
+        [state & 0xFFFF for state in stream_states(stream, 64)]
+        for stream in streams
+    ]
+    for first, second in itertools.combinations(low_bits, 2):
+        assert first != second
+        # Not one sequence offset by a constant either
+        assert len({(a - b) & 0xFFFF for a, b in zip(first, second)}) > 1
+
+
+@pytest.mark.parametrize("n", [2, 4, 8])
+def test_split_stream_outputs_are_not_shifted_copies(n):
+    streams = LinearCongruential(42).split(n)
+    outputs = [
+        [stream.generate_number(5, 15) for _ in range(64)]
+        for stream in streams
+    ]
+    for first, second in itertools.combinations(outputs, 2):
+        assert len({a - b for a, b in zip(first, second)}) > 1
+
+
+@pytest.mark.parametrize(
+    "n, stride",
+    [(2, 2**31 - 1), (3, 1431655765), (4, 2**30 - 1), (8, 2**29 - 1)],
+)
+def test_split_streams_continue_each_other(n, stride):
+    parent = LinearCongruential(42)
+    for stream in LinearCongruential(42).split(n):
+        assert stream.seed == parent.seed
+        parent.advance(stride)
+    # The last stream ends before the period comes back to the first one
+    assert n * stride <= parent.modulus
+
+
+def test_generate_numbers_matches_generate_number():
+    single = LinearCongruential(7)
+    batch = LinearCongruential(7)
+    expected = [single.generate_number(5, 15) for _ in range(1000)]
+    assert list(batch.generate_numbers(1000, 5, 15)) == expected
+    assert batch.seed == single.seed
@@ -0,0 +1,34 @@
+import middle_square
+from middle_square import STATES, MiddleSquare, Orbit
+
+
+def test_fixed_points():
+    assert middle_square.fixed_points() == [0, 100, 2500, 3792, 7600]
+
+
+def test_orbit_of_a_fixed_point():
+    assert middle_square.orbit(3792) == Orbit(0, 1, (3792,))
+
+
+def test_orbit_tail_and_cycle():
+    # 24 -> 0005 -> 0000, which squares to itself
+    assert middle_square.orbit(24) == Orbit(2, 1, (0,))
+    # 6100 -> 2100 -> 4100 -> 8100 -> 6100
+    assert middle_square.orbit(6100) == Orbit(0, 4, (6100, 2100, 4100, 8100))
+
+
+def test_orbits_match_orbit():
+    orbits = middle_square.orbits()
+    for seed in range(0, STATES, 97):
+        assert orbits[seed] == middle_square.orbit(seed)
+
+
+def test_generator_never_cycles_early():
+    # Even from a fixed point of the classic map, the seed steps by one
+    generator = MiddleSquare(3792)
+    seeds = set()
+    for _ in range(STATES):
+        seeds.add(generator.seed)
+        generator.generate_number(0, 9)
+    assert len(seeds) == STATES
+    assert generator.seed == 3792
@@ -0,0 +1,17 @@
+import montecarlo
+from shooter import FPS
+
+
+def test_progress_bot_completes_level_1():
+    episodes = [
+        montecarlo.run_episode((1, seed, "progress", 60 * FPS))
+        for seed in range(3)
+    ]
+    assert any(episode["completed"] for episode in episodes)
+
+
+def test_progress_bot_gets_past_the_first_ledge():
+    # The first ledge is 80 pixels above the player, out of reach if the
+    # player's position were rounded instead of truncated
+    episode = montecarlo.run_episode((1, 0, "progress", 60 * FPS))
+    assert episode["deaths"] == 0
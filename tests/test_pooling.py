@@ -0,0 +1,44 @@
+import gc
+import weakref
+
+import pygame
+
+import headless
+import pooling
+import shooter
+from shooter import Game
+
+
+class Pooled(pygame.sprite.Sprite):
+    def __init__(self, owner):
+        super().__init__()
+        self.pool = None
+        self.reset(owner)
+
+    def reset(self, owner):
+        self.owner = owner
+
+    def clear(self):
+        self.owner = None
+
+
+def test_release_clears_and_acquire_resets():
+    pool = pooling.SpritePool(Pooled, 2)
+    group = pygame.sprite.Group()
+    sprite = pool.acquire(group, "first")
+    pool.release(sprite)
+    assert sprite.owner is None and not sprite.alive()
+    assert pool.acquire(group, "second") is sprite
+    assert sprite.owner == "second" and sprite in group
+
+
+def test_free_grenades_do_not_keep_worlds_alive():
+    game = Game(1, seed=2)
+    # The scripted player throws grenades every 100 frames
+    headless.run(game, 400)
+    assert shooter.grenade_pool.stats["releases"] > 0
+    world = weakref.ref(game.world)
+    game.restart_level()
+    gc.collect()
+    assert world() is None
+    assert all(grenade.world is None for grenade in shooter.grenade_pool.free)
@@ -0,0 +1,135 @@
+import pytest
+
+import headless
+import replay
+from shooter import Game, Inputs
+
+
+def test_encode_decode_round_trip():
+    for mask in range(replay.RESTART):
+        buttons = replay.decode(mask)
+        assert replay.encode(Inputs(*buttons)) == mask
+    assert replay.encode(Inputs(), restart=True) == replay.RESTART
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2**21, 2**35 + 5])
+def test_varint_round_trip(value):
+    data = bytearray(b"x")
+    replay.write_varint(data, value)
+    assert replay.read_varint(bytes(data), 1) == (value, len(data))
+
+
+def test_truncated_varint():
+    data = bytearray()
+    replay.write_varint(data, 300)
+    with pytest.raises(ValueError):
+        replay.read_varint(bytes(data[:-1]), 0)
+
+
+def test_recording_stores_runs():
+    recording = replay.Recording(1, 7, (1, 2, 3, 4))
+    for _ in range(60):
+        recording.add(Inputs(moving_right=True))
+    recording.add(Inputs(moving_right=True), restart=True)
+    recording.add(Inputs())
+    right = replay.encode(Inputs(moving_right=True))
+    assert recording.runs == [
+        [right, 60],
+        [right | replay.RESTART, 1],
+        [0, 1],
+    ]
+    assert len(recording) == 62
+    assert list(recording.masks()) == [right] * 60 + [
+        right | replay.RESTART,
+        0,
+    ]
+
+
+def test_save_load_round_trip(tmp_path):
+    path = tmp_path / "session.replay"
+    recording = replay.Recording(
+        2, 2**63 + 1, (5, 6, 7, 8), preload=True, batch_enemies=True
+    )
+    for frame in range(500):
+        recording.add(headless.scripted_inputs(frame), restart=frame == 250)
+    replay.save(recording, path)
+    loaded = replay.load(path)
+    assert loaded.level == 2
+    assert loaded.seed == 2**63 + 1
+    assert loaded.seeds == (5, 6, 7, 8)
+    assert loaded.preload and loaded.batch_enemies
+    assert loaded.runs == recording.runs
+
+
+def saved(tmp_path):
+    path = tmp_path / "session.replay"
+    recording = replay.Recording(1, 3, (1, 2, 3, 4))
+    for frame in range(100):
+        recording.add(headless.scripted_inputs(frame))
+    replay.save(recording, path)
+    return path
+
+
+def test_load_rejects_other_versions(tmp_path):
+    path = saved(tmp_path)
+    data = bytearray(path.read_bytes())
+    data[4:6] = (replay.VERSION + 1).to_bytes(2, "little")
+    path.write_bytes(data)
+    with pytest.raises(ValueError, match="version"):
+        replay.load(path)
+
+
+def test_load_rejects_truncated_files(tmp_path):
+    path = saved(tmp_path)
+    data = path.read_bytes()
+    path.write_bytes(data[:-2])
+    with pytest.raises(ValueError):
+        replay.load(path)
+    path.write_bytes(data[: replay.HEADER.size - 1])
+    with pytest.raises(ValueError):
+        replay.load(path)
+
+
+def game_state(game):
+    world = game.world
+    player = world.player
+    return (
+        game.level,
+        game.completed,
+        tuple(player.rect),
+        player.health,
+        player.ammo,
+        player.grenades,
+        [(tuple(enemy.rect), enemy.health) for enemy in world.enemy_group],
+        [tuple(box.rect) for box in world.item_box_group],
+    )
+
+
+def test_playback_is_deterministic(tmp_path):
+    # Record a session the way the game does, restarting on every death
+    game = Game(1, preload=True, seed=11)
+    recording = replay.Recording(game.level, 11, game.seeds, preload=True)
+    restarted = False
+    for frame in range(4000):
+        inputs = headless.scripted_inputs(frame)
+        recording.add(inputs, restarted)
+        restarted = False
+        game.step(inputs)
+        if not game.world.player.alive:
+            game.restart_level()
+            restarted = True
+    expected = game_state(game)
+    game.close()
+    assert any(mask & replay.RESTART for mask, _ in recording.runs)
+
+    path = tmp_path / "session.replay"
+    replay.save(recording, path)
+    played = headless.play(replay.load(path))
+    assert game_state(played) == expected
+    played.close()
+
+
+def test_playback_rejects_other_games():
+    recording = replay.Recording(1, 11, (0, 0, 0, 0))
+    with pytest.raises(ValueError):
+        headless.play(recording)
@@ -0,0 +1,18 @@
+# Largest value of a 32 bit unsigned integer plus one
+UINT32 = 2**32
+
+
+def bounded(next_uint32, range_val):
+    # Map uniform 32 bit integers to [0, range_val) without modulo bias using
+    # Lemire's multiply-and-shift method. The high 32 bits of x * range_val
+    # are the result; the few x whose low 32 bits fall under the threshold
+    # would make some results more likely, so they are drawn again. The
+    # division that finds the threshold is only needed in that rare case
+    product = next_uint32() * range_val
+    low = product % UINT32
+    if low < range_val:
+        threshold = (UINT32 - range_val) % range_val
+        while low < threshold:
+            product = next_uint32() * range_val
+            low = product % UINT32
+    return product >> 32
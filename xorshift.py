@@ -0,0 +1,30 @@
+import time
+
+from unbiased import bounded
+
+MASK64 = 2**64 - 1
+# Multiplier scrambling the xorshift state into the output (xorshift*)
+MULTIPLIER = 0x2545F4914F6CDD1D
+
+
+class Xorshift:
+    def __init__(self, seed=None):
+        # Generate initial seed based on current time unless one is given,
+        # zero is the one state the generator can never leave
+        if seed is None:
+            seed = time.time_ns()
+        self.seed = seed & MASK64 or 1
+
+    def next_uint32(self):
+        # Shift the 64 bit state and output the high half of the scrambled
+        # state, its best quality bits
+        x = self.seed
+        x ^= x >> 12
+        x ^= (x << 25) & MASK64
+        x ^= x >> 27
+        self.seed = x
+        return (x * MULTIPLIER & MASK64) >> 32
+
+    def generate_number(self, minimum, maximum):
+        # Unbiased number in the range from the next 32 bit output
+        return minimum + bounded(self.next_uint32, maximum - minimum + 1)